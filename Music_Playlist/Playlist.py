@@ -1,26 +1,64 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox, simpledialog, ttk
+import io
 import os
 import random
 import pickle
+import queue
 import pygame
 from pygame import mixer
 import time
 import threading
+import itertools
+from playlist_formats import PLAYLIST_FILETYPES, read_playlist, write_playlist
+from undo import BulkOp, InsertOp, MoveOp, RemoveOp, UndoLog
+from play_history import PlayHistory
+from loudness import LoudnessAnalyzer, gain_factor
+from waveform import WaveformStore
+from control_server import CommandError, ControlServer, run_on
+from saver import BackgroundSaver
+from audio_cache import DEFAULT_BUDGET, AudioCache
+from crossfade import CrossfadeEngine
+from sorted_view import SortedView
+from file_status import FileStatus
+from play_queue import PlayQueue
 
-# Initialize pygame
-pygame.init()
-mixer.init()
+# Initialize pygame (spawned analysis workers set up their own mixer)
+if __name__ != "__mp_main__":
+    pygame.init()
+    mixer.init()
 
 class Song:
     """Represents a song with metadata"""
-    def __init__(self, filepath):
+    def __init__(self, filepath, title=None, artist=None, duration=None, probe=True):
         self.filepath = filepath
         self.filename = os.path.basename(filepath)
-        self.title = os.path.splitext(self.filename)[0]
-        self.artist = "Unknown Artist"
-        self.duration = self._get_duration()
+        self.title = title or os.path.splitext(self.filename)[0]
+        self.artist = artist or "Unknown Artist"
         self.album = "Unknown Album"
+        self.gain = None  # ReplayGain-style gain in dB, once analyzed
+        self.peak = None
+        # Fast metadata path: with probe=False an unknown duration is only
+        # probed the first time it is needed
+        self._duration = duration
+        if duration is None and probe:
+            self._duration = self._get_duration()
+
+    @property
+    def duration(self):
+        """Song duration in seconds, probing the file if not known yet"""
+        if self._duration is None:
+            self._duration = self._get_duration()
+        return self._duration
+
+    @duration.setter
+    def duration(self, value):
+        self._duration = value
+
+    @property
+    def known_duration(self):
+        """Duration if already known, without probing the file"""
+        return self._duration
         
     def _get_duration(self):
         """Get song duration using pygame"""
@@ -32,12 +70,28 @@ class Song:
         except:
             return 180  # Default to 3 minutes
 
+def path_key(song):
+    """Identity key for a song based on its normalized file path"""
+    return os.path.normcase(os.path.normpath(song.filepath))
+
+def fingerprint_key(song):
+    """Identity key for a song based on its metadata, ignoring location"""
+    duration = song.known_duration
+    return (
+        song.title.strip().lower(),
+        song.artist.strip().lower(),
+        int(round(duration)) if duration else None
+    )
+
+_node_serials = itertools.count()
+
 class PlaylistNode:
     """Node for doubly-linked list implementation"""
     def __init__(self, song):
         self.song = song
         self.next = None
         self.prev = None
+        self.serial = next(_node_serials)  # Creation order, for stable sorting
 
 class Playlist:
     """Playlist ADT using doubly-linked list"""
@@ -50,6 +104,91 @@ class Playlist:
         self.is_shuffled = False
         self.original_order = []
         self.shuffle_session = None  # Track played songs in shuffle mode
+        self.undo_log = None  # Shared UndoLog recording edits, if any
+        self.shuffle_weight = None  # Optional song -> weight for shuffle picks
+        self.shuffle_pick = None  # Next shuffle node, once chosen by peek_next
+        self.observers = []  # Sorted views told about linked/unlinked nodes
+        self.order_view = None  # Sorted view that playback follows, if any
+        
+    def _record(self, op):
+        """Record an applied mutation in the undo log, if attached"""
+        if self.undo_log is not None:
+            self.undo_log.record(op)
+        
+    def _notify(self, event, *args):
+        """Tell observers about a change in the playlist's nodes"""
+        for observer in self.observers:
+            getattr(observer, event)(*args)
+        
+    def _link_node(self, index, node):
+        """Insert node at index of original order and link it in place
+
+        Relinking is O(1); inserting into the original_order list is O(n).
+        """
+        if not self.original_order:
+            node.prev = node.next = None
+            self.head = self.tail = self.current = node
+        elif index > 0:
+            # Link after the node that precedes it in original order
+            before = self.original_order[index-1]
+            node.prev = before
+            node.next = before.next
+            if before.next:
+                before.next.prev = node
+            else:
+                self.tail = node
+            before.next = node
+        else:
+            after = self.original_order[0]
+            node.next = after
+            node.prev = after.prev
+            if after.prev:
+                after.prev.next = node
+            else:
+                self.head = node
+            after.prev = node
+            
+        self.original_order.insert(index, node)
+        self.length += 1
+        self._notify('node_added', node)
+        
+    def _unlink_node(self, node, index=None):
+        """Unlink node and drop it from original order, returning its index
+
+        Unlinking is O(1); deleting from the original_order list is O(n),
+        plus an O(n) search when index is missing or stale.
+        """
+        if node.prev:
+            node.prev.next = node.next
+        else:
+            self.head = node.next
+            
+        if node.next:
+            node.next.prev = node.prev
+        else:
+            self.tail = node.prev
+            
+        # Update current if needed
+        if self.current is node:
+            self.current = node.next if node.next else self.head
+            
+        if index is None or index >= len(self.original_order) or self.original_order[index] is not node:
+            index = self.original_order.index(node)
+        del self.original_order[index]
+        
+        node.prev = node.next = None
+        self.length -= 1
+        self._notify('node_removed', node)
+        return index
+        
+    def _move_node(self, from_index, to_index):
+        """Move the node at from_index of original order to to_index"""
+        node = self.original_order[from_index]
+        was_current = self.current is node
+        self._unlink_node(node, from_index)
+        self._link_node(to_index, node)
+        if was_current:
+            self.current = node
         
     def add_song(self, song):
         """Add song to end of playlist"""
@@ -66,32 +205,16 @@ class Playlist:
             
         self.length += 1
         self.original_order.append(new_node)
+        self._notify('node_added', new_node)
+        self._record(InsertOp(self, self.length - 1, new_node))
         
     def remove_song(self, song_title):
         """Remove song by title"""
         current = self.head
         while current:
             if current.song.title == song_title:
-                # Update pointers
-                if current.prev:
-                    current.prev.next = current.next
-                else:
-                    self.head = current.next
-                    
-                if current.next:
-                    current.next.prev = current.prev
-                else:
-                    self.tail = current.prev
-                    
-                # Update current if needed
-                if self.current == current:
-                    self.current = current.next if current.next else self.head
-                    
-                # Update original order
-                if current in self.original_order:
-                    self.original_order.remove(current)
-                
-                self.length -= 1
+                index = self._unlink_node(current)
+                self._record(RemoveOp(self, index, current))
                 return True
             current = current.next
         return False
@@ -106,13 +229,13 @@ class Playlist:
             if node.song.title == song_title:
                 if direction == "up" and i > 0:
                     # Swap with previous in original order
-                    self.original_order[i], self.original_order[i-1] = self.original_order[i-1], self.original_order[i]
-                    self._rebuild_linked_list()
+                    self._move_node(i, i-1)
+                    self._record(MoveOp(self, node, i, i-1))
                     return True
                 elif direction == "down" and i < len(self.original_order) - 1:
                     # Swap with next in original order
-                    self.original_order[i], self.original_order[i+1] = self.original_order[i+1], self.original_order[i]
-                    self._rebuild_linked_list()
+                    self._move_node(i, i+1)
+                    self._record(MoveOp(self, node, i, i+1))
                     return True
         return False
         
@@ -180,14 +303,138 @@ class Playlist:
         self._rebuild_linked_list()
         self.is_shuffled = False
         
-    def get_song_list(self):
-        """Get list of song titles in current order"""
-        songs = []
+    def _set_order(self, nodes):
+        """Replace the playlist contents in a single structural update"""
+        kept = set(map(id, nodes))
+        current = self.current if self.current and id(self.current) in kept else None
+        
+        self.original_order = nodes
+        self.length = len(nodes)
+        self.shuffle_session = [] if self.is_shuffled else None
+        
+        for i, node in enumerate(nodes):
+            node.prev = nodes[i-1] if i > 0 else None
+            node.next = nodes[i+1] if i < len(nodes)-1 else None
+        
+        self.head = nodes[0] if nodes else None
+        self.tail = nodes[-1] if nodes else None
+        self.current = current or self.head
+        self._notify('nodes_reset')
+        
+    def _keep_nodes(self, keep, label):
+        """Drop nodes failing keep(node) in one update, returning the count"""
+        nodes = []
+        removed = []
+        for i, node in enumerate(self.original_order):
+            if keep(node):
+                nodes.append(node)
+            else:
+                removed.append((i, node))
+        
+        if removed:
+            self._set_order(nodes)
+            self._record(BulkOp(self, label, removed=removed))
+        return len(removed)
+        
+    def merge(self, *others, key=path_key):
+        """Append songs from other playlists that are not already present"""
+        seen = {key(node.song) for node in self.original_order}
+        added = []
+        for other in others:
+            for node in other.original_order:
+                k = key(node.song)
+                if k not in seen:
+                    seen.add(k)
+                    added.append(PlaylistNode(node.song))
+        
+        if added:
+            self._set_order(self.original_order + added)
+            self._record(BulkOp(self, f"Merge into {self.name}", added=added))
+        return len(added)
+        
+    def difference(self, other, key=path_key):
+        """Remove songs that also appear in another playlist"""
+        exclude = {key(node.song) for node in other.original_order}
+        return self._keep_nodes(lambda node: key(node.song) not in exclude,
+                                f"Remove songs in {other.name}")
+        
+    def intersection(self, other, key=path_key):
+        """Keep only songs that also appear in another playlist"""
+        include = {key(node.song) for node in other.original_order}
+        return self._keep_nodes(lambda node: key(node.song) in include,
+                                f"Keep songs in {other.name}")
+        
+    def dedupe(self, key=path_key):
+        """Remove repeated songs, keeping the first occurrence"""
+        seen = set()
+        def first_seen(node):
+            k = key(node.song)
+            if k in seen:
+                return False
+            seen.add(k)
+            return True
+        return self._keep_nodes(first_seen, "Remove duplicates")
+        
+    def sort_by(self, *fields, getters=None):
+        """List and play songs sorted by fields, or in playlist order with none
+        
+        Fields are "title", "artist", "album" and "duration", plus any in
+        getters (field -> song key function); prefix one with "-" to sort
+        it in descending order.
+        """
+        if self.order_view:
+            self.order_view.close()
+        if fields:
+            self.order_view = SortedView(self, fields, getters)
+        self.shuffle_pick = None
+        return self.order_view
+        
+    def song_changed(self, song):
+        """Re-sort a song whose metadata changed in any attached views"""
+        if not self.observers:
+            return
+        for node in self.original_order:
+            if node.song is song:
+                self._notify('node_changed', node)
+        
+    def songs_changed(self, paths):
+        """Re-sort songs at any of the given file paths in attached views"""
+        if not self.observers:
+            return
+        for node in self.original_order:
+            if node.song.filepath in paths:
+                self._notify('node_changed', node)
+        
+    def iter_nodes(self):
+        """Iterate over nodes in current order, following the sorted view if set"""
+        if self.order_view:
+            yield from self.order_view
+            return
         current = self.head
         while current:
-            songs.append(current.song.title)
+            yield current
             current = current.next
-        return songs
+        
+    def iter_songs(self):
+        """Iterate over songs in current order"""
+        for node in self.iter_nodes():
+            yield node.song
+
+    def get_song_list(self):
+        """Get list of song titles in current order"""
+        return [node.song.title for node in self.iter_nodes()]
+        
+    def _following(self, node):
+        """Node after the given one in playback order, wrapping around"""
+        if self.order_view:
+            return self.order_view.next_node(node)
+        return node.next or self.head
+        
+    def _preceding(self, node):
+        """Node before the given one in playback order, wrapping around"""
+        if self.order_view:
+            return self.order_view.previous_node(node)
+        return node.prev or self.tail
         
     def play_next(self):
         """Move to next song in playlist or random in shuffle mode"""
@@ -195,28 +442,56 @@ class Playlist:
             return None
 
         if self.is_shuffled:
-            # True random shuffle: pick a random unplayed song
-            if self.shuffle_session is None or len(self.shuffle_session) == self.length:
-                # Reset session if all songs played
-                self.shuffle_session = []
-            # Build list of unplayed nodes
-            unplayed = [node for node in self.original_order if node not in self.shuffle_session]
-            if not unplayed:
-                # All played, reset
-                self.shuffle_session = []
-                unplayed = self.original_order.copy()
-            next_node = random.choice(unplayed)
+            # Use the pick announced by peek_next if it is still in the playlist
+            next_node = self.shuffle_pick
+            self.shuffle_pick = None
+            if next_node is None or not any(node is next_node for node in self.original_order):
+                next_node = self._pick_shuffle()
             self.shuffle_session.append(next_node)
             self.current = next_node
         else:
-            # Queue mode: play next in order
-            if self.current.next:
-                self.current = self.current.next
-            else:
-                self.current = self.head  # Loop to start
+            # Queue mode: play next in order, looping to the start
+            self.current = self._following(self.current)
 
         return self.current.song
         
+    def _pick_shuffle(self):
+        """Choose a random unplayed node for shuffle mode"""
+        # True random shuffle: pick a random unplayed song
+        if self.shuffle_session is None or len(self.shuffle_session) >= self.length:
+            # Reset session if all songs played
+            self.shuffle_session = []
+        # Build list of unplayed nodes
+        played = set(map(id, self.shuffle_session))
+        unplayed = [node for node in self.original_order if id(node) not in played]
+        if not unplayed:
+            # All played, reset
+            self.shuffle_session = []
+            unplayed = self.original_order.copy()
+        if self.shuffle_weight:
+            weights = [self.shuffle_weight(node.song) for node in unplayed]
+            return random.choices(unplayed, weights=weights)[0]
+        return random.choice(unplayed)
+        
+    def peek_next(self):
+        """Song that play_next will move to, without moving"""
+        if not self.current:
+            return None
+        if self.is_shuffled:
+            # Decide the next random pick now so it can be prefetched
+            if self.shuffle_pick is None:
+                self.shuffle_pick = self._pick_shuffle()
+            return self.shuffle_pick.song
+        return self._following(self.current).song
+        
+    def peek_previous(self):
+        """Song that play_previous will move to, without moving"""
+        if not self.current:
+            return None
+        if self.is_shuffled:
+            return self.peek_next()
+        return self._preceding(self.current).song
+        
     def play_previous(self):
         """Move to previous song in playlist (queue mode only)"""
         if not self.current:
@@ -226,13 +501,28 @@ class Playlist:
             # In shuffle mode, just pick another random song
             return self.play_next()
         else:
-            if self.current.prev:
-                self.current = self.current.prev
-            else:
-                self.current = self.tail  # Loop to end
+            self.current = self._preceding(self.current)  # Loops to the end
 
         return self.current.song
 
+# Sort choices offered in the UI and the fields each one sorts by
+SORT_ORDERS = {
+    "Playlist Order": (),
+    "Title": ("title", "artist"),
+    "Artist": ("artist", "album", "title"),
+    "Album": ("album", "title"),
+    "Duration": ("duration", "title"),
+    "Longest First": ("-duration", "title"),
+    "Most Played": ("-plays", "title"),
+    "Recently Played": ("-last_played", "title")
+}
+
+# How combine operations decide two songs are the same
+MATCH_KEYS = {
+    "path": path_key,
+    "fingerprint": fingerprint_key
+}
+
 class MusicPlayerApp:
     """Main application GUI"""
     def __init__(self, root):
@@ -246,6 +536,8 @@ class MusicPlayerApp:
         # Playlist manager
         self.playlists = {}
         self.current_playlist = None
+        self.undo_log = UndoLog()
+        self.play_queue = PlayQueue()  # "Up Next" songs, played before the playlist continues
         
         # Playback state
         self.is_playing = False
@@ -254,6 +546,55 @@ class MusicPlayerApp:
         self.song_length = 0
         self.start_time = 0
         self.pause_time = 0
+        self.seek_offset = 0  # Position in seconds at the last play or seek
+        self.pos_base = 0  # mixer.music.get_pos() at the last play or seek
+        
+        # Crossfade playback on mixer channels, created when first enabled
+        self.crossfade = None
+        self.using_channels = False  # Current song plays through self.crossfade
+        
+        # Results from background workers, applied on the Tk thread
+        self._ui_events = queue.Queue()
+        
+        # Play history
+        self.history = PlayHistory(
+            on_update=lambda paths: self._ui_events.put(lambda: self._history_updated(paths)))
+        self.sort_getters = {
+            'plays': self.history.sort_key('plays'),
+            'last_played': self.history.sort_key('last_played')
+        }
+        self.play_started_at = None
+        self.play_playlist_name = None
+        
+        # Playlist saves are coalesced and written off the Tk thread
+        self.saver = BackgroundSaver(
+            'playlists.pkl',
+            self._serialize_playlists,
+            on_error=lambda e: self._ui_events.put(
+                lambda: messagebox.showerror("Save Error", f"Could not save playlists:\n{str(e)}")))
+        
+        # Preloaded audio for instant track switches
+        try:
+            budget = int(float(os.environ["MUSIC_PLAYER_CACHE_MB"]) * 1024 * 1024)
+        except (KeyError, ValueError, OverflowError):
+            budget = DEFAULT_BUDGET  # Unset or not a number
+        self.audio_cache = AudioCache(budget if budget >= 0 else DEFAULT_BUDGET)
+        
+        # Cached, batched checks of which song files are available
+        self.file_status = FileStatus(
+            lambda changed: self._ui_events.put(lambda: self._files_changed(changed)))
+        
+        # Waveform overview for the progress bar
+        self.waveform_peaks = None
+        self.waveforms = WaveformStore(
+            lambda path, peaks: self._ui_events.put(
+                lambda: self._waveform_ready(path, peaks)))
+        
+        # Loudness normalization
+        self.loudness_cache = {}  # path -> (gain_db, peak)
+        self.analyzer = LoudnessAnalyzer(
+            lambda path, gain, peak: self._ui_events.put(
+                lambda: self._loudness_ready(path, gain, peak)))
         
         # Store button references for state management
         self.move_up_btn = None
@@ -265,9 +606,25 @@ class MusicPlayerApp:
         
         # Create GUI
         self._create_widgets()
+        self._update_up_next()
         
-        # Start progress updater
+        # Start progress updater and background result processing
         self._update_progress()
+        self._process_ui_events()
+        
+        # Optional local control server
+        self.control_server = None
+        self.remote_call = False  # Handling a control server command
+        self._start_control_server()
+        
+        # Analyze loudness of the current playlist in the background
+        if self.current_playlist:
+            self._queue_loudness_analysis(self.playlists[self.current_playlist])
+        
+        # Undo/redo shortcuts
+        self.root.bind_all("<Control-z>", lambda e: self._undo())
+        self.root.bind_all("<Control-y>", lambda e: self._redo())
+        self.root.bind_all("<Control-Z>", lambda e: self._redo())
         
         # Handle window close
         self.root.protocol("WM_DELETE_WINDOW", self._on_close)
@@ -278,14 +635,6 @@ class MusicPlayerApp:
         style.theme_use('clam')
         
         # Custom styles
-        style.configure("custom.Horizontal.TProgressbar",
-                       background='#4CAF50',
-                       troughcolor='#f0f0f0',
-                       bordercolor='#333',
-                       lightcolor='#4CAF50',
-                       darkcolor='#2E7D32',
-                       thickness=10)
-        
         style.configure('TButton', font=('Helvetica', 10), padding=5)
         style.map('TButton',
                 foreground=[('active', 'black'), ('!active', 'black')],
@@ -328,6 +677,18 @@ class MusicPlayerApp:
             command=self._delete_playlist
         ).pack(side=tk.LEFT, padx=2)
         
+        ttk.Button(
+            playlist_controls,
+            text="Import",
+            command=self._import_playlist
+        ).pack(side=tk.LEFT, padx=2)
+        
+        ttk.Button(
+            playlist_controls,
+            text="Export",
+            command=self._export_playlist
+        ).pack(side=tk.LEFT, padx=2)
+        
         # Song list frame
         song_list_frame = tk.Frame(main_frame)
         song_list_frame.pack(fill=tk.BOTH, expand=True, pady=5)
@@ -370,6 +731,22 @@ class MusicPlayerApp:
             text="Remove",
             command=self._remove_song
         ).pack(side=tk.LEFT, padx=2)
+        
+        combine_btn = ttk.Menubutton(song_controls, text="Combine")
+        combine_menu = tk.Menu(combine_btn, tearoff=0)
+        combine_menu.add_command(label="Merge From...", command=lambda: self._combine_playlists("merge"))
+        combine_menu.add_command(label="Remove Songs In...", command=lambda: self._combine_playlists("difference"))
+        combine_menu.add_command(label="Keep Only Songs In...", command=lambda: self._combine_playlists("intersection"))
+        combine_menu.add_separator()
+        combine_menu.add_command(label="Remove Duplicates", command=lambda: self._combine_playlists("dedupe"))
+        combine_menu.add_separator()
+        self.match_metadata_var = tk.BooleanVar(value=False)
+        combine_menu.add_checkbutton(
+            label="Match by Title, Artist and Duration",
+            variable=self.match_metadata_var
+        )
+        combine_btn['menu'] = combine_menu
+        combine_btn.pack(side=tk.LEFT, padx=2)
 
         self.order_btn = ttk.Button(
             song_controls,
@@ -385,6 +762,30 @@ class MusicPlayerApp:
         )
         self.shuffle_btn.pack(side=tk.LEFT, padx=2)
         
+        tk.Label(song_controls, text="Sort:").pack(side=tk.LEFT, padx=(5, 0))
+        self.sort_var = tk.StringVar(value="Playlist Order")
+        sort_dropdown = ttk.Combobox(
+            song_controls,
+            textvariable=self.sort_var,
+            values=list(SORT_ORDERS),
+            state='readonly',
+            width=14
+        )
+        sort_dropdown.pack(side=tk.LEFT, padx=2)
+        sort_dropdown.bind("<<ComboboxSelected>>", self._sort_playlist)
+        
+        ttk.Button(
+            song_controls,
+            text="Undo",
+            command=self._undo
+        ).pack(side=tk.LEFT, padx=2)
+        
+        ttk.Button(
+            song_controls,
+            text="Redo",
+            command=self._redo
+        ).pack(side=tk.LEFT, padx=2)
+        
         # Playback controls frame
         playback_controls = tk.Frame(main_frame)
         playback_controls.pack(fill=tk.X, pady=5)
@@ -415,6 +816,37 @@ class MusicPlayerApp:
             command=self._next_song
         ).pack(side=tk.LEFT, padx=2)
         
+        ttk.Button(
+            playback_controls,
+            text="Play Next",
+            command=lambda: self._queue_selected(first=True)
+        ).pack(side=tk.LEFT, padx=(10, 2))
+        
+        ttk.Button(
+            playback_controls,
+            text="Add to Queue",
+            command=self._queue_selected
+        ).pack(side=tk.LEFT, padx=2)
+        
+        ttk.Button(
+            playback_controls,
+            text="Clear Queue",
+            command=self._clear_queue
+        ).pack(side=tk.LEFT, padx=2)
+        
+        ttk.Button(
+            playback_controls,
+            text="Stats",
+            command=self._show_stats
+        ).pack(side=tk.RIGHT, padx=2)
+        
+        self.smart_shuffle_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            playback_controls,
+            text="Smart Shuffle",
+            variable=self.smart_shuffle_var
+        ).pack(side=tk.RIGHT, padx=2)
+        
         # Progress bar frame
         progress_frame = tk.Frame(main_frame)
         progress_frame.pack(fill=tk.X, pady=5)
@@ -428,15 +860,22 @@ class MusicPlayerApp:
         )
         self.time_elapsed.pack(side=tk.LEFT)
         
+        # Seekable progress bar drawn over the track's waveform
         self.progress_var = tk.DoubleVar()
-        self.progress_bar = ttk.Progressbar(
+        self.progress_canvas = tk.Canvas(
             progress_frame,
-            variable=self.progress_var,
-            maximum=100,
-            style="custom.Horizontal.TProgressbar",
-            mode='determinate'
+            height=36,
+            bg='#f0f0f0',
+            highlightthickness=1,
+            highlightbackground='#333',
+            cursor='hand2'
         )
-        self.progress_bar.pack(side=tk.LEFT, expand=True, fill=tk.X, padx=5)
+        self.progress_canvas.pack(side=tk.LEFT, expand=True, fill=tk.X, padx=5)
+        self.progress_canvas.create_rectangle(0, 0, 0, 0, fill='#A5D6A7', outline='', tags='progress')
+        self.progress_canvas.create_line(0, 0, 0, 0, fill='#2E7D32', width=2, tags='cursor')
+        self.progress_canvas.bind("<Configure>", self._draw_waveform)
+        self.progress_canvas.bind("<Button-1>", self._on_progress_click)
+        self.progress_var.trace_add('write', lambda *args: self._draw_progress())
         
         self.time_total = tk.Label(
             progress_frame,
@@ -464,6 +903,35 @@ class MusicPlayerApp:
             length=150
         ).pack(side=tk.LEFT, padx=5)
         
+        self.normalize_var = tk.BooleanVar(value=self.analyzer.available)
+        ttk.Checkbutton(
+            volume_frame,
+            text="Normalize Volume",
+            variable=self.normalize_var,
+            command=lambda: self._set_volume(self.volume_var.get()),
+            state='normal' if self.analyzer.available else 'disabled'
+        ).pack(side=tk.LEFT, padx=5)
+        
+        self.crossfade_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            volume_frame,
+            text="Crossfade",
+            variable=self.crossfade_var,
+            command=self._toggle_crossfade
+        ).pack(side=tk.LEFT, padx=5)
+        
+        self.crossfade_seconds = tk.DoubleVar(value=5)
+        ttk.Spinbox(
+            volume_frame,
+            from_=1,
+            to=12,
+            increment=1,
+            width=3,
+            textvariable=self.crossfade_seconds,
+            command=self._toggle_crossfade
+        ).pack(side=tk.LEFT)
+        tk.Label(volume_frame, text="s").pack(side=tk.LEFT)
+        
         # Now playing info
         self.now_playing_frame = tk.Frame(main_frame, bd=1, relief=tk.SUNKEN)
         self.now_playing_frame.pack(fill=tk.X, pady=5)
@@ -484,6 +952,14 @@ class MusicPlayerApp:
         )
         self.song_info_label.pack(fill=tk.X)
         
+        self.up_next_label = tk.Label(
+            self.now_playing_frame,
+            text="Up Next: (queue empty)",
+            font=('Helvetica', 9),
+            anchor=tk.W
+        )
+        self.up_next_label.pack(fill=tk.X)
+        
         # Status bar
         self.status_var = tk.StringVar(value="Ready")
         status_bar = ttk.Label(
@@ -508,6 +984,7 @@ class MusicPlayerApp:
                 messagebox.showwarning("Duplicate Name", "Playlist with this name already exists")
                 return
             self.playlists[name] = Playlist(name)
+            self.playlists[name].undo_log = self.undo_log
             self.current_playlist = name
             self._update_playlist_dropdown()
             self._update_song_list()
@@ -525,7 +1002,7 @@ class MusicPlayerApp:
             if self.is_playing:
                 self._stop_song()
             
-            del self.playlists[self.current_playlist]
+            self.undo_log.discard(self.playlists.pop(self.current_playlist))
             self.current_playlist = None
             self._update_playlist_dropdown()
             self._update_song_list()
@@ -533,6 +1010,72 @@ class MusicPlayerApp:
             self._save_playlists()
             self.status_var.set("Playlist deleted")
     
+    def _import_playlist(self):
+        """Import an M3U/M3U8, PLS or XSPF file as a new playlist"""
+        filepath = filedialog.askopenfilename(
+            title="Import Playlist",
+            filetypes=PLAYLIST_FILETYPES
+        )
+        if not filepath:
+            return
+        
+        # Name the playlist after the file, avoiding existing names
+        base_name = os.path.splitext(os.path.basename(filepath))[0] or "Imported"
+        name = base_name
+        suffix = 2
+        while name in self.playlists:
+            name = f"{base_name} ({suffix})"
+            suffix += 1
+        
+        playlist = Playlist(name)
+        try:
+            # Entries are streamed in and reuse the file's durations
+            for entry in read_playlist(filepath):
+                playlist.add_song(Song(
+                    entry.path,
+                    title=entry.title,
+                    artist=entry.artist,
+                    duration=entry.duration,
+                    probe=False
+                ))
+        except Exception as e:
+            messagebox.showerror("Import Error", f"Could not import {filepath}:\n{str(e)}")
+            return
+        
+        playlist.undo_log = self.undo_log
+        self.playlists[name] = playlist
+        self.current_playlist = name
+        self._update_playlist_dropdown()
+        self._update_song_list()
+        self._update_move_buttons_state()
+        self._update_shuffle_button_state()
+        self._save_playlists()
+        self.status_var.set(f"Imported {playlist.length} song(s) into {name}")
+    
+    def _export_playlist(self):
+        """Export current playlist as M3U/M3U8, PLS or XSPF"""
+        if not self.current_playlist:
+            messagebox.showwarning("No Playlist", "No playlist selected")
+            return
+        
+        filepath = filedialog.asksaveasfilename(
+            title="Export Playlist",
+            initialfile=f"{self.current_playlist}.m3u8",
+            defaultextension=".m3u8",
+            filetypes=PLAYLIST_FILETYPES[1:]
+        )
+        if not filepath:
+            return
+        
+        playlist = self.playlists[self.current_playlist]
+        try:
+            count = write_playlist(filepath, playlist.iter_songs(), title=playlist.name)
+        except Exception as e:
+            messagebox.showerror("Export Error", f"Could not export playlist:\n{str(e)}")
+            return
+        
+        self.status_var.set(f"Exported {count} song(s) to {os.path.basename(filepath)}")
+    
     def _select_playlist(self, event=None):
         """Select a playlist from dropdown"""
         selected = self.playlist_var.get()
@@ -541,6 +1084,8 @@ class MusicPlayerApp:
             self._update_song_list()
             self._update_move_buttons_state()
             self._update_shuffle_button_state()
+            self._update_sort_choice()
+            self._queue_loudness_analysis(self.playlists[selected])
             self.status_var.set(f"Selected playlist: {selected}")
     
     def _update_playlist_dropdown(self):
@@ -555,6 +1100,7 @@ class MusicPlayerApp:
         else:
             self.playlist_var.set("")
             self.current_playlist = None
+        self._update_sort_choice()
     
     def _add_songs(self):
         """Add songs to current playlist"""
@@ -569,20 +1115,23 @@ class MusicPlayerApp:
         
         if filepaths:
             added_count = 0
-            for filepath in filepaths:
-                try:
-                    if os.path.exists(filepath):
-                        song = Song(filepath)
-                        self.playlists[self.current_playlist].add_song(song)
-                        added_count += 1
-                    else:
-                        messagebox.showwarning("File Not Found", f"File not found: {filepath}")
-                except Exception as e:
-                    messagebox.showerror("Error", f"Could not add {filepath}:\n{str(e)}")
+            available = self.file_status.check_many(filepaths)
+            with self.undo_log.group(f"Add songs to {self.current_playlist}"):
+                for filepath in filepaths:
+                    try:
+                        if available[filepath]:
+                            song = Song(filepath)
+                            self.playlists[self.current_playlist].add_song(song)
+                            added_count += 1
+                        else:
+                            messagebox.showwarning("File Not Found", f"File not found: {filepath}")
+                    except Exception as e:
+                        messagebox.showerror("Error", f"Could not add {filepath}:\n{str(e)}")
             
             if added_count > 0:
                 self._update_song_list()
                 self._save_playlists()
+                self._queue_loudness_analysis(self.playlists[self.current_playlist])
                 self.status_var.set(f"Added {added_count} song(s) to {self.current_playlist}")
     
     def _remove_song(self):
@@ -608,6 +1157,76 @@ class MusicPlayerApp:
         else:
             messagebox.showerror("Error", f"Could not remove {song_title}")
     
+    def _ask_other_playlist(self, title):
+        """Ask the user to pick a playlist other than the current one"""
+        choices = [name for name in self.playlists if name != self.current_playlist]
+        if not choices:
+            messagebox.showwarning("No Playlist", "There is no other playlist to combine with")
+            return None
+        
+        dialog = tk.Toplevel(self.root)
+        dialog.title(title)
+        dialog.transient(self.root)
+        dialog.resizable(False, False)
+        
+        tk.Label(dialog, text="Playlist:").pack(side=tk.TOP, anchor=tk.W, padx=10, pady=(10, 0))
+        choice_var = tk.StringVar(value=choices[0])
+        ttk.Combobox(
+            dialog,
+            textvariable=choice_var,
+            values=choices,
+            state='readonly'
+        ).pack(fill=tk.X, padx=10, pady=5)
+        
+        result = []
+        def accept():
+            result.append(choice_var.get())
+            dialog.destroy()
+        
+        buttons = tk.Frame(dialog)
+        buttons.pack(fill=tk.X, padx=10, pady=(0, 10))
+        ttk.Button(buttons, text="Cancel", command=dialog.destroy).pack(side=tk.RIGHT, padx=2)
+        ttk.Button(buttons, text="OK", command=accept).pack(side=tk.RIGHT, padx=2)
+        
+        dialog.grab_set()
+        self.root.wait_window(dialog)
+        return result[0] if result else None
+    
+    def _combine_playlists(self, operation):
+        """Apply a bulk merge, difference, intersection or dedupe to current playlist"""
+        if not self.current_playlist:
+            messagebox.showwarning("No Playlist", "No playlist selected")
+            return
+        
+        playlist = self.playlists[self.current_playlist]
+        # Same file, or same song wherever it is stored
+        key = fingerprint_key if self.match_metadata_var.get() else path_key
+        if operation == "dedupe":
+            changed = playlist.dedupe(key=key)
+            message = f"Removed {changed} duplicate(s) from {playlist.name}"
+        else:
+            titles = {
+                "merge": "Merge From Playlist",
+                "difference": "Remove Songs In Playlist",
+                "intersection": "Keep Only Songs In Playlist"
+            }
+            other_name = self._ask_other_playlist(titles[operation])
+            if not other_name:
+                return
+            
+            other = self.playlists[other_name]
+            changed = getattr(playlist, operation)(other, key=key)
+            if operation == "merge":
+                message = f"Merged {changed} song(s) from {other_name} into {playlist.name}"
+            else:
+                message = f"Removed {changed} song(s) from {playlist.name}"
+        
+        if changed:
+            self._stop_if_removed(playlist)
+            self._update_song_list()
+            self._save_playlists()
+        self.status_var.set(message)
+    
     def _move_song(self, direction):
         """Move song up or down in playlist"""
         if not self.current_playlist:
@@ -620,6 +1239,10 @@ class MusicPlayerApp:
             messagebox.showwarning("Shuffle Active", "Cannot move songs while shuffle is active")
             return
         
+        if playlist.order_view:
+            messagebox.showwarning("Sorted", "Cannot move songs while the playlist is sorted")
+            return
+        
         selected = self.song_listbox.curselection()
         if not selected:
             messagebox.showwarning("No Selection", "Please select a song to move")
@@ -640,6 +1263,43 @@ class MusicPlayerApp:
             
             self.status_var.set(f"Moved {song_title} {direction}")
     
+    def _undo(self):
+        """Undo the most recent playlist edit"""
+        self._apply_history(self.undo_log.undo, "undo", "Undid")
+    
+    def _redo(self):
+        """Redo the most recently undone playlist edit"""
+        self._apply_history(self.undo_log.redo, "redo", "Redid")
+    
+    def _apply_history(self, step, action, verb):
+        """Apply an undo or redo step and persist the result"""
+        try:
+            op = step()
+        except Exception as e:
+            messagebox.showerror("Undo Error", f"Could not {action} edit:\n{str(e)}")
+            return
+        
+        if not op:
+            self.status_var.set(f"Nothing to {action}")
+            return
+        
+        # Show the playlist that changed
+        playlist = op.playlist
+        if playlist.name != self.current_playlist and self.playlists.get(playlist.name) is playlist:
+            self.playlist_var.set(playlist.name)
+            self._select_playlist()
+        
+        self._stop_if_removed(playlist)
+        self._update_song_list()
+        self._save_playlists()
+        self.status_var.set(f"{verb}: {op.label}")
+    
+    def _stop_if_removed(self, playlist):
+        """Stop playback if the playing song was removed from the playlist it plays from"""
+        if (self.current_song and self.play_playlist_name == playlist.name
+                and all(song is not self.current_song for song in playlist.iter_songs())):
+            self._stop_song()
+    
     def _toggle_order(self):
         """Set playlist to queue (ordered) mode"""
         if not self.current_playlist:
@@ -648,9 +1308,12 @@ class MusicPlayerApp:
         playlist = self.playlists[self.current_playlist]
         playlist.is_shuffled = False
         playlist.shuffle_session = None
+        playlist.shuffle_pick = None
         self.order_btn.config(text="Order: ON")
         self.shuffle_btn.config(text="Shuffle: OFF")
         self._update_song_list()
+        if self.current_song:
+            self._prefetch_neighbours(self.current_song)
         self.status_var.set(f"{playlist.name} set to queue order")
 
     def _toggle_shuffle(self):
@@ -661,9 +1324,12 @@ class MusicPlayerApp:
         playlist = self.playlists[self.current_playlist]
         playlist.is_shuffled = True
         playlist.shuffle_session = []
+        playlist.shuffle_pick = None
         self.shuffle_btn.config(text="Shuffle: ON")
         self.order_btn.config(text="Order: OFF")
         self._update_song_list()
+        if self.current_song:
+            self._prefetch_neighbours(self.current_song)
         self.status_var.set(f"{playlist.name} set to shuffle mode")
 
     def _update_move_buttons_state(self):
@@ -672,11 +1338,35 @@ class MusicPlayerApp:
             return
             
         playlist = self.playlists[self.current_playlist]
-        state = 'disabled' if playlist.is_shuffled else 'normal'
+        state = 'disabled' if playlist.is_shuffled or playlist.order_view else 'normal'
         
         self.move_up_btn.config(state=state)
         self.move_down_btn.config(state=state)
     
+    def _sort_playlist(self, event=None):
+        """List and play the current playlist in the chosen sort order"""
+        if not self.current_playlist:
+            return
+        
+        playlist = self.playlists[self.current_playlist]
+        choice = self.sort_var.get()
+        playlist.sort_by(*SORT_ORDERS.get(choice, ()), getters=self.sort_getters)
+        self._update_song_list()
+        self._update_move_buttons_state()
+        if self.current_song:
+            self._prefetch_neighbours(self.current_song)
+        self._save_playlists()
+        self.status_var.set(f"{playlist.name} sorted by {choice.lower()}")
+    
+    def _update_sort_choice(self):
+        """Show the current playlist's sort order in the dropdown"""
+        playlist = self.playlists.get(self.current_playlist)
+        fields = playlist.order_view.fields if playlist and playlist.order_view else ()
+        for choice, choice_fields in SORT_ORDERS.items():
+            if choice_fields == fields:
+                self.sort_var.set(choice)
+                break
+    
     def _update_shuffle_button_state(self):
         """Update shuffle button text based on current playlist state"""
         if not self.current_playlist or not self.shuffle_btn:
@@ -694,8 +1384,15 @@ class MusicPlayerApp:
             return
         
         playlist = self.playlists[self.current_playlist]
-        for song in playlist.get_song_list():
-            self.song_listbox.insert(tk.END, song)
+        songs = list(playlist.iter_songs())
+        for song in songs:
+            self.song_listbox.insert(tk.END, song.title)
+        
+        # Grey out missing songs; stale answers are refreshed in the background
+        available = self.file_status.lookup([song.filepath for song in songs])
+        for index, song in enumerate(songs):
+            if available[song.filepath] is False:
+                self._mark_song(index, False)
         
         # Highlight current song if playing
         if playlist.current and self.current_song:
@@ -709,16 +1406,36 @@ class MusicPlayerApp:
             except (ValueError, AttributeError):
                 pass
     
+    def _mark_song(self, index, available):
+        """Show a listbox row as available or missing"""
+        self.song_listbox.itemconfig(index, foreground='' if available else '#9E9E9E')
+    
+    def _files_changed(self, changed):
+        """Update the song list for files that appeared or went missing (runs on the Tk thread)"""
+        playlist = self.playlists.get(self.current_playlist)
+        if not playlist:
+            return
+        for index, song in enumerate(playlist.iter_songs()):
+            if song.filepath in changed:
+                self._mark_song(index, changed[song.filepath])
+        missing = sum(1 for available in changed.values() if not available)
+        if missing:
+            self.status_var.set(f"{missing} song file(s) are missing")
+    
     # Playback control methods
     def _play_pause(self):
         """Toggle play/pause"""
         if self.is_paused:
             # Resume paused song
-            mixer.music.unpause()
+            if self.using_channels:
+                self.crossfade.unpause()
+            else:
+                mixer.music.unpause()
             self.is_paused = False
             self.start_time += time.time() - self.pause_time
             self.play_pause_btn.config(text="⏸")
             self.status_var.set(f"Resumed: {self.current_song.title if self.current_song else 'Unknown'}")
+            self._publish("state", state="playing")
         elif self.is_playing:
             # Pause current song
             self._pause_song()
@@ -752,34 +1469,80 @@ class MusicPlayerApp:
         if playlist.current:
             self._play_audio(playlist.current.song)
     
-    def _play_audio(self, song):
-        """Play audio file"""
+    def _play_audio(self, song, source=None):
+        """Play audio file; source names the playlist a queued song came from"""
         try:
-            if not os.path.exists(song.filepath):
-                messagebox.showerror("File Not Found", f"Audio file not found:\n{song.filepath}")
+            if not self.file_status.available(song.filepath, recheck_missing=True):
+                self._report_error("File Not Found", f"Audio file not found:\n{song.filepath}")
                 return
+            
+            self._finish_play()
+            if self.crossfade_var.get():
+                # Decoded and started by the crossfade engine's threads
+                mixer.music.stop()
+                self._load_gain(song)
+                self._crossfade_engine().play(song.filepath, self._track_volume(song))
+                self.using_channels = True
+            else:
+                data = self.audio_cache.get(song.filepath)
+                if data is not None:
+                    # Play from memory; namehint tells pygame the format
+                    ext = os.path.splitext(song.filepath)[1].lstrip('.').lower()
+                    mixer.music.load(io.BytesIO(data), ext)
+                else:
+                    mixer.music.load(song.filepath)
+                if self.using_channels:
+                    self.crossfade.stop()
+                    self.using_channels = False
                 
-            mixer.music.load(song.filepath)
-            mixer.music.play()
+                # Apply per-track gain before the first sample plays
+                self._load_gain(song)
+                mixer.music.set_volume(self._track_volume(song))
+                mixer.music.play()
             
             self.current_song = song
-            self.song_length = song.duration if song.duration > 0 else 180
-            self.is_playing = True
-            self.is_paused = False
-            self.start_time = time.time()
-
-            self.time_total.config(text=self._format_time(self.song_length))
-            self.progress_var.set(0)
-
-            self.play_pause_btn.config(text="⏸")
-            self._update_now_playing(song)
-            self._update_song_list()
-            self.status_var.set(f"Now playing: {song.title}")
+            self.seek_offset = 0
+            self.pos_base = 0
+            self._song_started(song, source)
             
         except pygame.error as e:
-            messagebox.showerror("Playback Error", f"Could not play file:\n{str(e)}")
+            # The file may have gone since it was last checked; next/previous
+            # skip it once it is known to be missing
+            self.file_status.mark(song.filepath, os.path.exists(song.filepath))
+            self._report_error("Playback Error", f"Could not play file:\n{str(e)}")
+        except CommandError:
+            raise
         except Exception as e:
-            messagebox.showerror("Unexpected Error", f"An error occurred:\n{str(e)}")
+            self._report_error("Unexpected Error", f"An error occurred:\n{str(e)}")
+    
+    def _song_started(self, song, source=None):
+        """Update state and display for a song that has started playing"""
+        if song.gain is None:
+            self.analyzer.request(song.filepath, priority=True)
+        
+        self.play_started_at = time.time()
+        self.play_playlist_name = source or self.current_playlist
+        probed = song.known_duration is None
+        self.song_length = song.duration if song.duration > 0 else 180
+        if probed:
+            # A newly learned duration can move the song in sorted views
+            for playlist in self.playlists.values():
+                playlist.song_changed(song)
+        self.is_playing = True
+        self.is_paused = False
+        self.start_time = time.time()
+        
+        self.time_total.config(text=self._format_time(self.song_length))
+        self.waveform_peaks = self.waveforms.get(song.filepath)
+        self._draw_waveform()
+        self.progress_var.set(0)
+        
+        self.play_pause_btn.config(text="⏸")
+        self._update_now_playing(song)
+        self._update_song_list()
+        self.status_var.set(f"Now playing: {song.title}")
+        self._publish("now_playing", song=self._song_info(song), playlist=self.current_playlist)
+        self._prefetch_neighbours(song)
     
     def _update_now_playing(self, song):
         """Update now playing info"""
@@ -792,21 +1555,185 @@ class MusicPlayerApp:
         info_text = f"Artist: {song.artist} | Album: {song.album} | Duration: {duration_str}"
         self.song_info_label.config(text=info_text)
     
+    def _prefetch_neighbours(self, song):
+        """Preload the current song and the likely next and previous ones"""
+        paths = [song.filepath]
+        playlist = self.playlists.get(self.current_playlist)
+        for neighbour in (self._upcoming(), playlist.peek_previous() if playlist else None):
+            if neighbour:
+                paths.append(neighbour.filepath)
+        self.audio_cache.prefetch(paths)
+        self._arm_crossfade()
+    
+    # Crossfade methods
+    def _crossfade_engine(self):
+        """The crossfade engine, created on first use"""
+        if self.crossfade is None:
+            self.crossfade = CrossfadeEngine(
+                lambda kind, path, session: self._ui_events.put(
+                    lambda: self._crossfade_event(kind, path, session)),
+                open_audio=self._open_audio,
+                overlap=self._crossfade_overlap())
+        return self.crossfade
+    
+    def _open_audio(self, path):
+        """Cached file contents for the crossfade decoder, or the path itself"""
+        data = self.audio_cache.get(path)
+        return io.BytesIO(data) if data is not None else path
+    
+    def _crossfade_overlap(self):
+        """Crossfade length in seconds from the spinbox"""
+        try:
+            return min(12.0, max(1.0, float(self.crossfade_seconds.get())))
+        except (ValueError, tk.TclError):
+            return 5.0
+    
+    def _toggle_crossfade(self):
+        """Apply the crossfade checkbox and length"""
+        if self.crossfade_var.get():
+            self._crossfade_engine().overlap = self._crossfade_overlap()
+            if self.is_playing and not self.using_channels:
+                self.status_var.set("Crossfade starts with the next song")
+        self._arm_crossfade()
+    
+    def _arm_crossfade(self):
+        """Tell the crossfade engine which song to fade into next"""
+        if not self.using_channels:
+            return
+        
+        upcoming = self._upcoming() if self.crossfade_var.get() else None
+        if upcoming:
+            self._load_gain(upcoming)
+            self.crossfade.arm(upcoming.filepath, self._track_volume(upcoming))
+        else:
+            self.crossfade.arm(None, 0)
+    
+    def _crossfade_event(self, kind, path, session):
+        """Follow the crossfade engine's playback (runs on the Tk thread)"""
+        if not self.using_channels or session != self.crossfade.session:
+            return  # Playback has moved on since the event was sent
+        
+        if kind == "advanced":
+            # The engine is already fading into the armed song; move the
+            # queue or playlist along to match
+            self._finish_play(finished=True)
+            song, source = self._take_next()
+            if song is None:
+                self._stop_song()
+            elif song.filepath != path:
+                self._play_audio(song, source)  # Changed after the fade was armed
+            else:
+                self._load_gain(song)
+                self.current_song = song
+                self._song_started(song, source)
+        elif kind == "ended":
+            self._finish_play(finished=True)
+            self._next_song()
+        elif kind == "error":
+            messagebox.showerror("Playback Error", f"Could not play file:\n{path}")
+            self._stop_song()
+    
+    def _elapsed_time(self):
+        """Seconds of the current song played so far"""
+        if self.is_paused:
+            return self.pause_time - self.start_time
+        return time.time() - self.start_time
+    
+    def _finish_play(self, finished=False):
+        """Log the current song's play to the history, once per play"""
+        if not self.current_song or self.play_started_at is None:
+            return
+        
+        listened = min(self._elapsed_time(), self.song_length)
+        skipped = not finished and listened < self.song_length * 0.5
+        self.history.record(self.current_song, self.play_playlist_name,
+                            self.play_started_at, listened, skipped)
+        self.play_started_at = None
+    
+    def _history_updated(self, paths):
+        """Re-sort playlists ordered by play statistics (runs on the Tk thread)"""
+        refresh = False
+        for name, playlist in self.playlists.items():
+            view = playlist.order_view
+            if view and any(field.lstrip('-') in self.sort_getters for field in view.fields):
+                playlist.songs_changed(paths)
+                refresh = refresh or name == self.current_playlist
+        
+        if refresh:
+            self._update_song_list()
+            if self.current_song:
+                self._prefetch_neighbours(self.current_song)
+    
+    def _show_stats(self):
+        """Show most played, most skipped and recently played songs"""
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Listening Statistics")
+        dialog.transient(self.root)
+        
+        text = tk.Text(dialog, width=60, height=30, font=('Helvetica', 9), wrap=tk.NONE)
+        text.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        sections = [
+            ("Most Played", [(path, f"{count} play(s)") for path, count in self.history.most_played(10)]),
+            ("Most Skipped", [(path, f"{count} skip(s)") for path, count in self.history.most_skipped(10)]),
+            ("Recently Played", [(path, "") for path in self.history.recently_played(10)])
+        ]
+        for heading, rows in sections:
+            text.insert(tk.END, f"{heading}\n")
+            if not rows:
+                text.insert(tk.END, "  (none yet)\n")
+            for i, (path, detail) in enumerate(rows, 1):
+                line = f"  {i}. {self.history.title(path)}"
+                text.insert(tk.END, f"{line}  -  {detail}\n" if detail else f"{line}\n")
+            text.insert(tk.END, "\n")
+        
+        saves = self.saver.stats()
+        text.insert(tk.END, "Playlist Saves\n")
+        text.insert(tk.END, f"  {saves['submits']} change(s) written in {saves['writes']} save(s)"
+                            f" ({saves['coalescing_ratio']:.1f} changes per save)\n")
+        text.insert(tk.END, f"  Latency: {saves['avg_latency'] * 1000:.0f} ms average,"
+                            f" {saves['max_latency'] * 1000:.0f} ms max\n")
+        
+        cache = self.audio_cache.stats()
+        text.insert(tk.END, "\nAudio Cache\n")
+        text.insert(tk.END, f"  {cache['items']} track(s), {cache['used'] / 1048576:.1f}"
+                            f" of {cache['budget'] / 1048576:.0f} MB\n")
+        text.insert(tk.END, f"  Hit rate: {cache['hit_rate']:.0%} ({cache['hits']} hits,"
+                            f" {cache['misses']} misses), {cache['evictions']} eviction(s)\n")
+        
+        files = self.file_status.stats()
+        text.insert(tk.END, "\nSong Files\n")
+        text.insert(tk.END, f"  {files['paths']} known, {files['missing']} missing;"
+                            f" {files['checks']} check(s), {files['hits']} answered from cache\n")
+        text.config(state=tk.DISABLED)
+        
+        ttk.Button(dialog, text="Close", command=dialog.destroy).pack(pady=(0, 10))
+    
     def _pause_song(self):
         """Pause current song"""
         if self.is_playing and not self.is_paused:
-            mixer.music.pause()
+            if self.using_channels:
+                self.crossfade.pause()
+            else:
+                mixer.music.pause()
             self.is_paused = True
             self.pause_time = time.time()
             self.play_pause_btn.config(text="⏯")
             self.status_var.set(f"Paused: {self.current_song.title if self.current_song else 'Unknown'}")
+            self._publish("state", state="paused")
     
     def _stop_song(self):
         """Stop playback"""
+        self._finish_play()
         mixer.music.stop()
+        if self.using_channels:
+            self.crossfade.stop()
+            self.using_channels = False
         self.is_playing = False
         self.is_paused = False
         self.current_song = None
+        self.waveform_peaks = None
+        self._draw_waveform()
         self.progress_var.set(0)
         self.time_elapsed.config(text="0:00")
         self.time_total.config(text="0:00")
@@ -814,22 +1741,108 @@ class MusicPlayerApp:
         self.status_var.set("Playback stopped")
         self.now_playing_label.config(text="Now Playing: ")
         self.song_info_label.config(text="No song selected")
+        self._publish("state", state="stopped")
     
     def _next_song(self):
-        """Play next song in playlist"""
+        """Play the next queued song, or the next song in the playlist"""
+        if not self.play_queue:
+            if not self.current_playlist or not self.playlists[self.current_playlist].length:
+                return
+        
+        next_song, source = self._take_next()
+        
+        if next_song:
+            self._play_audio(next_song, source)
+        else:
+            self._stop_song()
+    
+    def _take_next(self):
+        """Remove and return the next (song, source playlist) to play
+        
+        The Up Next queue comes first, in both order and shuffle mode;
+        the playlist only moves on once the queue is empty.
+        """
+        if self.play_queue:
+            entry = self.play_queue.dequeue()
+            while entry and self.file_status.is_missing(entry[0].filepath):
+                entry = self.play_queue.dequeue()
+            self._queue_changed()
+            if entry:
+                return entry
+        
+        playlist = self.playlists.get(self.current_playlist)
+        if not playlist or not playlist.length:
+            return None, None
+        playlist.shuffle_weight = self.history.shuffle_weight if self.smart_shuffle_var.get() else None
+        return self._step_playlist(playlist, playlist.play_next), None
+    
+    def _upcoming(self):
+        """Song that _next_song will play, without moving"""
+        for song, _ in self.play_queue:
+            if not self.file_status.is_missing(song.filepath):
+                return song
+        playlist = self.playlists.get(self.current_playlist)
+        return playlist.peek_next() if playlist else None
+    
+    # Up Next queue methods
+    def _queue_selected(self, first=False):
+        """Queue the selected song, to play next or after the queued ones"""
         if not self.current_playlist:
+            messagebox.showwarning("No Playlist", "No playlist selected")
             return
         
-        playlist = self.playlists[self.current_playlist]
-        if not playlist.length:
+        selected = self.song_listbox.curselection()
+        if not selected:
+            messagebox.showwarning("No Selection", "Please select a song to queue")
             return
-            
-        next_song = playlist.play_next()
         
-        if next_song:
-            self._play_audio(next_song)
+        playlist = self.playlists[self.current_playlist]
+        node = next(itertools.islice(playlist.iter_nodes(), selected[0], None), None)
+        if node:
+            self._queue_song(node.song, self.current_playlist, first)
+    
+    def _queue_song(self, song, playlist_name, first=False):
+        """Add a song to the Up Next queue"""
+        if first:
+            self.play_queue.play_next(song, playlist_name)
         else:
-            self._stop_song()
+            self.play_queue.append(song, playlist_name)
+        self._queue_changed()
+        if self.current_song:
+            self._prefetch_neighbours(self.current_song)
+        self.status_var.set(f"{'Playing next' if first else 'Queued'}: {song.title}")
+    
+    def _clear_queue(self):
+        """Empty the Up Next queue"""
+        if not self.play_queue:
+            return
+        self.play_queue.clear()
+        self._queue_changed()
+        if self.current_song:
+            self._prefetch_neighbours(self.current_song)
+        self.status_var.set("Queue cleared")
+    
+    def _queue_changed(self):
+        """Show, save and announce the Up Next queue after a change"""
+        self._update_up_next()
+        self._save_playlists()
+        if self.control_server and self.control_server.has_subscribers:
+            self._publish("queue", songs=self._remote_queue())
+    
+    def _update_up_next(self):
+        """Show the head of the Up Next queue"""
+        entry = self.play_queue.peek()
+        if entry is None:
+            text = "Up Next: (queue empty)"
+        elif len(self.play_queue) > 1:
+            text = f"Up Next: {entry[0].title} (+{len(self.play_queue) - 1} more)"
+        else:
+            text = f"Up Next: {entry[0].title}"
+        self.up_next_label.config(text=text)
+    
+    def _remote_queue(self):
+        """The Up Next queue for remote clients"""
+        return [dict(self._song_info(song), playlist=name) for song, name in self.play_queue]
     
     def _previous_song(self):
         """Play previous song in playlist"""
@@ -840,38 +1853,203 @@ class MusicPlayerApp:
         if not playlist.length:
             return
             
-        prev_song = playlist.play_previous()
+        prev_song = self._step_playlist(playlist, playlist.play_previous)
         
         if prev_song:
             self._play_audio(prev_song)
         else:
             self._stop_song()
     
+    def _step_playlist(self, playlist, step):
+        """Move through a playlist, skipping songs known to be missing"""
+        song = step()
+        for _ in range(playlist.length - 1):
+            if not song or not self.file_status.is_missing(song.filepath):
+                break
+            song = step()
+        return song
+    
+    def _effective_volume(self):
+        """Slider volume adjusted by the current track's normalization gain"""
+        return self._track_volume(self.current_song)
+    
+    def _track_volume(self, song):
+        """Slider volume adjusted by a track's normalization gain"""
+        volume = self.volume_var.get()
+        if self.normalize_var.get() and song and song.gain is not None:
+            volume *= gain_factor(song.gain)
+        return min(1.0, max(0.0, volume))
+    
+    def _load_gain(self, song):
+        """Fill in a song's gain from finished analyses"""
+        if song.gain is None and song.filepath in self.loudness_cache:
+            song.gain, song.peak = self.loudness_cache[song.filepath]
+    
     def _set_volume(self, val):
         """Set playback volume"""
         try:
-            volume = float(val)
-            mixer.music.set_volume(volume)
+            float(val)
+            if self.using_channels:
+                self.crossfade.set_volume(self._effective_volume())
+                self._arm_crossfade()
+            else:
+                mixer.music.set_volume(self._effective_volume())
         except (ValueError, pygame.error):
             pass
     
+    def _queue_loudness_analysis(self, playlist):
+        """Queue songs without known loudness for background analysis"""
+        for node in playlist.original_order:
+            path = node.song.filepath
+            # Known-missing files would only fail in a worker; a song that
+            # comes back is analysed when it is next played
+            if (node.song.gain is None and path not in self.loudness_cache
+                    and not self.file_status.is_missing(path)):
+                self.analyzer.request(path)
+    
+    def _loudness_ready(self, path, gain, peak):
+        """Store a finished loudness analysis (runs on the Tk thread)"""
+        self.analyzer.finished(path, gain is not None)
+        if gain is None:
+            return
+        
+        self.loudness_cache[path] = (gain, peak)
+        if self.current_song and self.current_song.filepath == path:
+            self.current_song.gain, self.current_song.peak = gain, peak
+            self._set_volume(self.volume_var.get())
+    
+    def _process_ui_events(self):
+        """Run callbacks queued by background threads on the Tk thread"""
+        try:
+            while True:
+                callback = self._ui_events.get_nowait()
+                try:
+                    callback()
+                except Exception:
+                    pass  # A failed background result must not stop the loop
+        except queue.Empty:
+            pass
+        
+        self.root.after(100, self._process_ui_events)
+    
+    def _position(self):
+        """Playback position in seconds, from the mixer's own clock"""
+        if self.using_channels:
+            return self.crossfade.position()
+        pos_ms = mixer.music.get_pos()
+        if pos_ms < 0:
+            return self.seek_offset
+        return self.seek_offset + max(0, pos_ms - self.pos_base) / 1000.0
+    
+    def _seek(self, seconds):
+        """Jump to a position in the current song"""
+        if not self.is_playing or not self.current_song:
+            return
+        
+        seconds = min(max(0, seconds), self.song_length)
+        if self.using_channels:
+            if not self.crossfade.seek(seconds):
+                self.status_var.set("Seeking in crossfade mode needs NumPy and a loaded song")
+                return
+            self.progress_var.set((seconds / self.song_length) * 100 if self.song_length > 0 else 0)
+            self.time_elapsed.config(text=self._format_time(seconds))
+            return
+        
+        try:
+            mixer.music.set_pos(seconds)
+            self.pos_base = mixer.music.get_pos()
+        except pygame.error:
+            # Some formats can only seek by restarting at an offset
+            try:
+                mixer.music.play(start=seconds)
+                if self.is_paused:
+                    mixer.music.pause()
+                self.pos_base = 0
+            except pygame.error:
+                self.status_var.set("Seeking is not supported for this file")
+                return
+        
+        self.seek_offset = seconds
+        self.progress_var.set((seconds / self.song_length) * 100 if self.song_length > 0 else 0)
+        self.time_elapsed.config(text=self._format_time(seconds))
+    
+    def _on_progress_click(self, event):
+        """Seek to the clicked point of the progress bar"""
+        width = self.progress_canvas.winfo_width()
+        if width > 1:
+            self._seek((event.x / width) * self.song_length)
+    
+    def _draw_progress(self):
+        """Move the progress fill and cursor to the current position"""
+        canvas = self.progress_canvas
+        width = canvas.winfo_width()
+        height = canvas.winfo_height()
+        x = width * min(100, max(0, self.progress_var.get())) / 100
+        canvas.coords('progress', 0, 0, x, height)
+        canvas.coords('cursor', x, 0, x, height)
+    
+    def _draw_waveform(self, event=None):
+        """Draw the current song's waveform peaks across the progress bar"""
+        canvas = self.progress_canvas
+        canvas.delete('waveform')
+        width = canvas.winfo_width()
+        height = canvas.winfo_height()
+        peaks = self.waveform_peaks
+        
+        if peaks and width > 1:
+            # One peak per two pixels, taking the max of the buckets covered
+            mid = height / 2
+            count = len(peaks)
+            top = []
+            bottom = []
+            for x in range(0, width + 1, 2):
+                start = min(count - 1, x * count // width)
+                end = max(start + 1, min(count, (x + 2) * count // width))
+                level = max(peaks[start:end]) * (mid - 2)
+                top.extend((x, mid - level))
+                bottom.extend((x, mid + level))
+            
+            # Outline along the top, then back along the bottom
+            points = top
+            for i in range(len(bottom) - 2, -1, -2):
+                points.extend((bottom[i], bottom[i + 1]))
+            canvas.create_polygon(points, fill='#757575', outline='', tags='waveform')
+            canvas.tag_raise('cursor')
+        
+        self._draw_progress()
+    
+    def _waveform_ready(self, path, peaks):
+        """Store finished waveform peaks (runs on the Tk thread)"""
+        self.waveforms.store(path, peaks)
+        if peaks and self.current_song and self.current_song.filepath == path:
+            self.waveform_peaks = peaks
+            self._draw_waveform()
+    
     def _update_progress(self):
         """Update progress bar and time display"""
         try:
             if self.is_playing and not self.is_paused and self.current_song:
-                # Check if song is still playing
-                if not mixer.music.get_busy():
+                if self.using_channels:
+                    # The crossfade engine reports song ends itself; only
+                    # take its exact length once the song is decoded
+                    length = self.crossfade.length()
+                    if length and abs(length - self.song_length) > 0.5:
+                        self.song_length = length
+                        self.time_total.config(text=self._format_time(length))
+                elif not mixer.music.get_busy():
                     # Song finished, play next
+                    self._finish_play(finished=True)
                     self._next_song()
                     self.root.after(200, self._update_progress)
                     return
                 
-                elapsed_time = time.time() - self.start_time
+                elapsed_time = self._position()
                 
-                if elapsed_time >= self.song_length:
+                if elapsed_time >= self.song_length and not self.using_channels:
                     # Song should be finished
                     self.progress_var.set(100)
                     self.time_elapsed.config(text=self._format_time(self.song_length))
+                    self._finish_play(finished=True)
                     self._next_song()
                     self.root.after(200, self._update_progress)
                     return
@@ -882,6 +2060,10 @@ class MusicPlayerApp:
                 
                 self.progress_var.set(progress_percent)
                 self.time_elapsed.config(text=self._format_time(elapsed_time))
+                
+                if self.control_server and self.control_server.has_subscribers:
+                    self._publish("progress", position=round(elapsed_time, 2),
+                                  duration=round(self.song_length, 2))
         
         except Exception as e:
             # Handle any unexpected errors gracefully
@@ -900,27 +2082,261 @@ class MusicPlayerApp:
         except (ValueError, TypeError):
             return "0:00"
     
+    # Remote control methods
+    def _start_control_server(self):
+        """Start the control server if MUSIC_PLAYER_CONTROL is set
+        
+        Use "unix:/path/to/socket" for a Unix socket, or a port number
+        (optionally "host:port") for a localhost TCP server. Hosts other
+        than 127.0.0.1, ::1 and localhost are refused.
+        """
+        spec = os.environ.get("MUSIC_PLAYER_CONTROL", "").strip()
+        if not spec:
+            return
+        
+        dispatch = lambda cmd, args: run_on(self._ui_events.put, self._remote_call, cmd, args)
+        try:
+            if spec.startswith("unix:"):
+                server = ControlServer(dispatch, unix_path=spec[5:])
+            else:
+                host, _, port = spec.rpartition(":")
+                server = ControlServer(dispatch, host=host.strip("[]") or "127.0.0.1", port=int(port))
+            address = server.start()
+        except (OSError, ValueError) as e:
+            self.status_var.set(f"Control server not started: {e}")
+            return
+        
+        self.control_server = server
+        self.status_var.set(f"Control server listening on {address}")
+    
+    def _publish(self, event, **data):
+        """Send an event to control server subscribers"""
+        if self.control_server:
+            self.control_server.publish(event, **data)
+    
+    def _song_info(self, song):
+        """JSON-friendly description of a song"""
+        return {
+            'title': song.title,
+            'artist': song.artist,
+            'album': song.album,
+            'path': song.filepath,
+            'duration': song.known_duration,
+            'missing': self.file_status.is_missing(song.filepath)
+        }
+    
+    def _remote_status(self):
+        """Snapshot of the player state for remote clients"""
+        playlist = self.playlists.get(self.current_playlist)
+        return {
+            'state': 'paused' if self.is_paused else 'playing' if self.is_playing else 'stopped',
+            'song': self._song_info(self.current_song) if self.current_song else None,
+            'position': round(self._position(), 2) if self.is_playing else 0,
+            'duration': self.song_length if self.is_playing else 0,
+            'volume': self.volume_var.get(),
+            'crossfade': self._crossfade_overlap() if self.crossfade_var.get() else 0,
+            'playlist': self.current_playlist,
+            'shuffle': playlist.is_shuffled if playlist else False,
+            'queue': len(self.play_queue)
+        }
+    
+    def _remote_playlist(self, args):
+        """Playlist named in the command arguments, or the current one"""
+        name = args.get('playlist', self.current_playlist)
+        if name not in self.playlists:
+            raise CommandError(f"No such playlist: {name}")
+        return self.playlists[name]
+    
+    def _remote_call(self, cmd, args):
+        """Run a control server command, turning error dialogs into error replies"""
+        self.remote_call = True
+        try:
+            return self._remote_command(cmd, args)
+        finally:
+            self.remote_call = False
+    
+    def _report_error(self, title, message):
+        """Show an error dialog, or fail the remote command being handled
+        
+        A modal dialog would block the Tk thread, and with it every other
+        control client, until someone at the desktop dismissed it.
+        """
+        if self.remote_call:
+            raise CommandError(message.replace("\n", " "))
+        messagebox.showerror(title, message)
+    
+    def _remote_command(self, cmd, args):
+        """Carry out a control server command (runs on the Tk thread)"""
+        if cmd == "status":
+            pass
+        elif cmd in ("play", "play_pause", "pause", "stop", "next", "previous"):
+            if cmd in ("play", "play_pause", "next", "previous") and not (
+                    self.current_playlist and self.playlists[self.current_playlist].length) and not (
+                    cmd == "next" and self.play_queue):
+                raise CommandError("No songs in current playlist")
+            if cmd == "play":
+                if self.is_paused or not self.is_playing:
+                    self._play_pause()
+            elif cmd == "pause":
+                self._pause_song()
+            else:
+                {
+                    "play_pause": self._play_pause,
+                    "stop": self._stop_song,
+                    "next": self._next_song,
+                    "previous": self._previous_song
+                }[cmd]()
+        elif cmd == "volume":
+            volume = min(1.0, max(0.0, float(args['value'])))
+            self.volume_var.set(volume)
+            self._set_volume(volume)
+        elif cmd == "queue":
+            return self._remote_queue()
+        elif cmd == "queue_add":
+            playlist = self._remote_playlist(args)
+            index = int(args['index'])
+            if not 0 <= index < playlist.length:
+                raise CommandError(f"Index out of range: {index}")
+            node = next(itertools.islice(playlist.iter_nodes(), index, None))
+            self._queue_song(node.song, playlist.name, first=bool(args.get('next', False)))
+            return self._remote_queue()
+        elif cmd == "queue_clear":
+            self._clear_queue()
+            return self._remote_queue()
+        elif cmd == "crossfade":
+            if 'on' in args:
+                self.crossfade_var.set(bool(args['on']))
+            if 'seconds' in args:
+                self.crossfade_seconds.set(min(12.0, max(1.0, float(args['seconds']))))
+            self._toggle_crossfade()
+        elif cmd == "seek":
+            if not self.is_playing:
+                raise CommandError("Nothing is playing")
+            self._seek(float(args['seconds']))
+        elif cmd == "shuffle":
+            if not self.current_playlist:
+                raise CommandError("No playlist selected")
+            if args.get('on', True):
+                self._toggle_shuffle()
+            else:
+                self._toggle_order()
+        elif cmd == "playlists":
+            return [
+                {'name': name, 'length': playlist.length, 'shuffle': playlist.is_shuffled}
+                for name, playlist in self.playlists.items()
+            ]
+        elif cmd == "songs":
+            playlist = self._remote_playlist(args)
+            return [self._song_info(song) for song in playlist.iter_songs()]
+        elif cmd == "select_playlist":
+            playlist = self._remote_playlist(args)
+            self.playlist_var.set(playlist.name)
+            self._select_playlist()
+        elif cmd == "play_index":
+            playlist = self._remote_playlist(args)
+            index = int(args['index'])
+            if not 0 <= index < playlist.length:
+                raise CommandError(f"Index out of range: {index}")
+            node = next(itertools.islice(playlist.iter_nodes(), index, None))
+            if playlist.name != self.current_playlist:
+                self.playlist_var.set(playlist.name)
+                self._select_playlist()
+            playlist.current = node
+            self._play_audio(node.song)
+        elif cmd == "add_songs":
+            playlist = self._remote_playlist(args)
+            available = self.file_status.check_many(args['paths'])
+            paths = [path for path in args['paths'] if available[path]]
+            with self.undo_log.group(f"Add songs to {playlist.name}"):
+                for path in paths:
+                    playlist.add_song(Song(path))
+            if paths:
+                self._update_song_list()
+                self._save_playlists()
+                self._queue_loudness_analysis(playlist)
+            return {'added': len(paths)}
+        elif cmd in ("remove_song", "move_song"):
+            playlist = self._remote_playlist(args)
+            title = args['title']
+            if cmd == "remove_song":
+                changed = playlist.remove_song(title)
+                if changed and self.current_song and self.current_song.title == title:
+                    self._stop_song()
+            else:
+                changed = playlist.move_song(title, args.get('direction', 'up'))
+            if not changed:
+                raise CommandError(f"Could not {cmd.split('_')[0]} {title}")
+            self._update_song_list()
+            self._save_playlists()
+        elif cmd in ("merge", "difference", "intersection", "dedupe"):
+            playlist = self._remote_playlist(args)
+            key = MATCH_KEYS.get(args.get('key', 'path'))
+            if key is None:
+                raise CommandError(f"Unknown key: {args['key']} (use {' or '.join(MATCH_KEYS)})")
+            if cmd == "dedupe":
+                changed = playlist.dedupe(key=key)
+            else:
+                other = args.get('other')
+                if other not in self.playlists:
+                    raise CommandError(f"No such playlist: {other}")
+                changed = getattr(playlist, cmd)(self.playlists[other], key=key)
+            if changed:
+                self._stop_if_removed(playlist)
+                self._update_song_list()
+                self._save_playlists()
+            return {'changed': changed}
+        else:
+            raise CommandError(f"Unknown command: {cmd}")
+        
+        return self._remote_status()
+    
     # Data persistence methods
     def _save_playlists(self):
-        """Save playlists to file"""
-        try:
-            save_data = {}
-            for name, playlist in self.playlists.items():
-                # Save songs in original order
-                songs = []
-                for node in playlist.original_order:
-                    if node and node.song and os.path.exists(node.song.filepath):
-                        songs.append(node.song.filepath)
-                save_data[name] = {
-                    'songs': songs,
-                    'is_shuffled': playlist.is_shuffled
-                }
-            
-            with open('playlists.pkl', 'wb') as f:
-                pickle.dump(save_data, f)
-                
-        except Exception as e:
-            messagebox.showerror("Save Error", f"Could not save playlists:\n{str(e)}")
+        """Hand a snapshot of the playlists to the background saver"""
+        # Only song references are copied here; the file work happens
+        # in _serialize_playlists on the saver thread
+        playlists = [
+            (name, [node.song for node in playlist.original_order], playlist.is_shuffled,
+             playlist.order_view.fields if playlist.order_view else ())
+            for name, playlist in self.playlists.items()
+        ]
+        self.saver.submit((playlists, list(self.play_queue)))
+    
+    def _serialize_playlists(self, snapshot):
+        """Build the saved form of a playlist snapshot (runs on the saver thread)"""
+        playlists, queue = snapshot
+        save_data = {}
+        for name, songs, is_shuffled, sort_fields in playlists:
+            # Save songs in original order
+            paths = []
+            meta = {}
+            for song in songs:
+                # Missing songs are kept; the list shows them as unavailable
+                if song:
+                    paths.append(song.filepath)
+                    
+                    # Cached metadata so loading needn't probe or analyze again
+                    gain, peak = self.loudness_cache.get(song.filepath, (song.gain, song.peak))
+                    meta[song.filepath] = {
+                        'duration': song.known_duration,
+                        'gain': gain,
+                        'peak': peak
+                    }
+            save_data[name] = {
+                'songs': paths,
+                'is_shuffled': is_shuffled,
+                'sort': list(sort_fields),
+                'meta': meta
+            }
+        
+        return {
+            'version': 2,
+            'playlists': save_data,
+            'queue': [
+                {'path': song.filepath, 'playlist': name, 'duration': song.known_duration}
+                for song, name in queue
+            ]
+        }
     
     def _load_playlists(self):
         """Load playlists from file"""
@@ -928,29 +2344,64 @@ class MusicPlayerApp:
             with open('playlists.pkl', 'rb') as f:
                 save_data = pickle.load(f)
             
+            # Version 2 adds the Up Next queue; older files are just playlists
+            if isinstance(save_data.get('version'), int):
+                queue_data = save_data.get('queue', [])
+                save_data = save_data.get('playlists', {})
+            else:
+                queue_data = []
+            
+            # Check every saved song in one parallel batch
+            self.file_status.check_many([
+                path
+                for playlist_data in save_data.values()
+                for path in (playlist_data if isinstance(playlist_data, list) else playlist_data.get('songs', []))
+            ] + [entry['path'] for entry in queue_data])
+            
             for name, playlist_data in save_data.items():
                 # Handle old format (just list of songs)
                 if isinstance(playlist_data, list):
                     songs = playlist_data
                     is_shuffled = False
+                    meta = {}
+                    sort_fields = []
                 else:
                     songs = playlist_data.get('songs', [])
                     is_shuffled = playlist_data.get('is_shuffled', False)
+                    meta = playlist_data.get('meta', {})
+                    sort_fields = playlist_data.get('sort', [])
                 
                 self.playlists[name] = Playlist(name)
                 
-                # Add songs that still exist
+                # Missing songs are kept and shown as unavailable
                 for path in songs:
-                    if os.path.exists(path):
-                        try:
-                            song = Song(path)
-                            self.playlists[name].add_song(song)
-                        except Exception:
-                            continue  # Skip songs that can't be loaded
+                    try:
+                        info = meta.get(path, {})
+                        song = Song(path, duration=info.get('duration'),
+                                    probe=self.file_status.available(path))
+                        if info.get('gain') is not None:
+                            song.gain, song.peak = info['gain'], info.get('peak')
+                            self.loudness_cache[path] = (song.gain, song.peak)
+                        self.playlists[name].add_song(song)
+                    except Exception:
+                        continue  # Skip songs that can't be loaded
                 
                 # Restore shuffle state
                 if is_shuffled and self.playlists[name].length > 1:
                     self.playlists[name].shuffle()
+                
+                # Restore sort order, ignoring fields this version doesn't know
+                try:
+                    if sort_fields:
+                        self.playlists[name].sort_by(*sort_fields, getters=self.sort_getters)
+                except ValueError:
+                    pass
+                
+                # Record edits from here on, not the load itself
+                self.playlists[name].undo_log = self.undo_log
+            
+            if queue_data:
+                self._restore_queue(queue_data)
             
             # Set current playlist
             if self.playlists:
@@ -962,10 +2413,36 @@ class MusicPlayerApp:
         except Exception as e:
             messagebox.showerror("Load Error", f"Could not load playlists:\n{str(e)}")
     
+    def _restore_queue(self, queue_data):
+        """Rebuild the saved Up Next queue, sharing Song objects with playlists"""
+        songs = {}  # path -> {playlist name: Song}
+        for name, playlist in self.playlists.items():
+            for node in playlist.original_order:
+                songs.setdefault(node.song.filepath, {}).setdefault(name, node.song)
+        
+        for entry in queue_data:
+            path, name = entry['path'], entry.get('playlist')
+            found = songs.get(path, {})
+            song = found.get(name) or next(iter(found.values()), None)
+            if song is None:
+                song = Song(path, duration=entry.get('duration'), probe=False)
+            self.play_queue.append(song, name)
+    
     def _on_close(self):
         """Handle window close event"""
         try:
+            self._finish_play()
+            self.history.close()
+            self.analyzer.shutdown()
+            self.waveforms.shutdown()
+            if self.control_server:
+                self.control_server.stop()
             self._save_playlists()
+            self.saver.close()
+            self.audio_cache.shutdown()
+            self.file_status.shutdown()
+            if self.crossfade:
+                self.crossfade.shutdown()
             mixer.music.stop()
             mixer.quit()
             pygame.quit()
@@ -0,0 +1,104 @@
+"""Memory-budgeted LRU cache of audio file contents.
+
+Recently played tracks and the predicted next/previous ones are kept in
+memory as raw file bytes, which mixer.music can load straight from a
+BytesIO. That skips disk (or network mount) latency on track switches
+while costing far less memory than decoded PCM. Prefetching reads files
+on a background thread.
+"""
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_BUDGET = 64 * 1024 * 1024
+
+
+class AudioCache:
+    """LRU of path -> file bytes bounded by a total byte budget"""
+    def __init__(self, budget=DEFAULT_BUDGET, max_item_fraction=0.5):
+        self.budget = budget
+        self.max_item = int(budget * max_item_fraction)  # Larger files are not cached
+        self.lock = threading.Lock()
+        self.items = OrderedDict()
+        self.used = 0
+        self.in_flight = set()
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="audio-prefetch")
+
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.prefetched = 0
+
+    def get(self, path):
+        """Cached bytes for a file, or None; counts towards the hit rate"""
+        with self.lock:
+            data = self.items.get(path)
+            if data is None:
+                self.misses += 1
+                return None
+            self.items.move_to_end(path)
+            self.hits += 1
+            return data
+
+    def put(self, path, data):
+        """Store file bytes, evicting least recently used entries"""
+        size = len(data)
+        if size > self.max_item:
+            return False
+        with self.lock:
+            if path in self.items:
+                self.used -= len(self.items.pop(path))
+            while self.items and self.used + size > self.budget:
+                _, evicted = self.items.popitem(last=False)
+                self.used -= len(evicted)
+                self.evictions += 1
+            self.items[path] = data
+            self.used += size
+        return True
+
+    def prefetch(self, paths):
+        """Read files into the cache in the background"""
+        for path in paths:
+            with self.lock:
+                if not path or path in self.items or path in self.in_flight:
+                    continue
+                self.in_flight.add(path)
+            try:
+                self.executor.submit(self._load, path)
+            except RuntimeError:
+                with self.lock:
+                    self.in_flight.discard(path)
+                return  # Shut down
+
+    def _load(self, path):
+        try:
+            if os.path.getsize(path) <= self.max_item:
+                with open(path, 'rb') as f:
+                    data = f.read()
+                if self.put(path, data):
+                    with self.lock:
+                        self.prefetched += 1
+        except OSError:
+            pass  # Missing or unreadable; playback will report it
+        finally:
+            with self.lock:
+                self.in_flight.discard(path)
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'items': len(self.items),
+                'used': self.used,
+                'budget': self.budget,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'prefetched': self.prefetched
+            }
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,224 @@
+"""Local control server for driving the player from other programs.
+
+The server speaks newline-delimited JSON over a Unix socket or a localhost
+TCP port and runs its own asyncio loop in a background thread, so it never
+blocks the Tk main loop. Each request line is
+
+    {"id": 1, "cmd": "next", "args": {}}
+
+and is answered with {"id": 1, "ok": true, "result": ...} or
+{"id": 1, "ok": false, "error": "..."}. Sending {"cmd": "subscribe"}
+turns the connection into an event stream of {"event": ..., ...} lines
+such as now-playing changes and progress ticks.
+"""
+import asyncio
+import json
+import os
+import socket
+import threading
+from concurrent.futures import Future
+
+MAX_LINE = 1024 * 1024
+BACKLOG = 1024  # Pending connections, so bursts of clients are not refused
+EVENT_BACKLOG = 256  # Events buffered per subscriber before dropping old ones
+LOOPBACK_HOSTS = ("127.0.0.1", "::1", "localhost")  # The server is unauthenticated
+
+
+class CommandError(Exception):
+    """A command that cannot be carried out; reported back to the client"""
+
+
+class ControlServer:
+    """Asyncio JSON-lines server forwarding commands to a dispatch callable"""
+    def __init__(self, dispatch, unix_path=None, host="127.0.0.1", port=0):
+        # dispatch(cmd, args) must return a concurrent.futures.Future that
+        # is resolved by whichever thread owns the player state
+        if not unix_path and host not in LOOPBACK_HOSTS:
+            raise ValueError(f"Control server host must be loopback ({', '.join(LOOPBACK_HOSTS)}), not {host!r}")
+        self.dispatch = dispatch
+        self.unix_path = unix_path
+        self.host = host
+        self.port = port
+        self.address = None
+        self.loop = None
+        self.server = None
+        self.thread = None
+        self.subscribers = set()
+        self.writers = set()
+        self._started = threading.Event()
+        self._error = None
+
+    @property
+    def has_subscribers(self):
+        return bool(self.subscribers)
+
+    def start(self):
+        """Start serving in a background thread; returns the bound address"""
+        self.thread = threading.Thread(target=self._run, name="control-server", daemon=True)
+        self.thread.start()
+        self._started.wait()
+        if self._error:
+            raise self._error
+        return self.address
+
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_until_complete(self._start_server())
+        except Exception as e:
+            self._error = e
+            self._started.set()
+            return
+        self._started.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            self.loop.run_until_complete(self.loop.shutdown_asyncgens())
+            self.loop.close()
+
+    async def _start_server(self):
+        if self.unix_path and hasattr(socket, "AF_UNIX"):
+            if os.path.exists(self.unix_path):
+                os.remove(self.unix_path)  # Stale socket from a previous run
+            self.server = await asyncio.start_unix_server(
+                self._handle_client, path=self.unix_path, limit=MAX_LINE, backlog=BACKLOG)
+            os.chmod(self.unix_path, 0o600)
+            self.address = self.unix_path
+        else:
+            self.server = await asyncio.start_server(
+                self._handle_client, host=self.host, port=self.port, limit=MAX_LINE,
+                backlog=BACKLOG)
+            self.address = self.server.sockets[0].getsockname()[:2]
+
+    def stop(self):
+        """Close all connections and stop the loop thread"""
+        if not self.loop or not self.thread.is_alive():
+            return
+        future = asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop)
+        try:
+            future.result(timeout=2)
+        except Exception:
+            pass
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=2)
+        if self.unix_path and os.path.exists(self.unix_path):
+            os.remove(self.unix_path)
+
+    async def _shutdown(self):
+        self.server.close()
+        for queue in list(self.subscribers):
+            _offer(queue, None)
+        for writer in list(self.writers):
+            writer.close()
+        await self.server.wait_closed()
+
+    # Events
+    def publish(self, event, **data):
+        """Push an event to all subscribers; safe to call from any thread"""
+        if not self.subscribers or not self.loop:
+            return
+        line = _encode(dict(event=event, **data))
+        try:
+            self.loop.call_soon_threadsafe(self._broadcast, line)
+        except RuntimeError:
+            pass  # Loop already closed
+
+    def _broadcast(self, line):
+        for queue in self.subscribers:
+            _offer(queue, line)
+
+    async def _pump_events(self, queue, writer):
+        """Send queued events to one subscriber"""
+        while True:
+            line = await queue.get()
+            if line is None:
+                break
+            writer.write(line)
+            await writer.drain()
+
+    # Connections
+    async def _handle_client(self, reader, writer):
+        self.writers.add(writer)
+        queue = None
+        pump = None
+        try:
+            while True:
+                try:
+                    raw = await reader.readline()
+                except (asyncio.LimitOverrunError, ValueError):
+                    writer.write(_encode({"ok": False, "error": "Request too long"}))
+                    break
+                if not raw:
+                    break
+                raw = raw.strip()
+                if not raw:
+                    continue
+
+                try:
+                    request = json.loads(raw)
+                    cmd = request["cmd"]
+                    args = request.get("args") or {}
+                except (ValueError, KeyError, TypeError, AttributeError):
+                    writer.write(_encode({"ok": False, "error": "Malformed request"}))
+                    await writer.drain()
+                    continue
+
+                reply = {"id": request.get("id"), "ok": True, "result": None}
+                if cmd == "subscribe":
+                    if queue is None:
+                        queue = asyncio.Queue(EVENT_BACKLOG)
+                        self.subscribers.add(queue)
+                        pump = asyncio.ensure_future(self._pump_events(queue, writer))
+                elif cmd == "unsubscribe":
+                    if queue is not None:
+                        self.subscribers.discard(queue)
+                        _offer(queue, None)
+                        await pump
+                        queue = pump = None
+                else:
+                    try:
+                        reply["result"] = await asyncio.wrap_future(self.dispatch(cmd, args))
+                    except KeyError as e:
+                        reply = {"id": request.get("id"), "ok": False, "error": f"Missing argument: {e}"}
+                    except Exception as e:
+                        reply = {"id": request.get("id"), "ok": False, "error": str(e)}
+
+                writer.write(_encode(reply))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            if queue is not None:
+                self.subscribers.discard(queue)
+            if pump is not None:
+                pump.cancel()
+            self.writers.discard(writer)
+            writer.close()
+
+
+def _offer(queue, item):
+    """Queue an item, dropping the oldest one if a slow client is behind"""
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(item)
+
+
+def _encode(message):
+    return (json.dumps(message, separators=(",", ":"), default=str) + "\n").encode("utf-8")
+
+
+def run_on(post, handler, cmd, args):
+    """Run handler(cmd, args) via post(callable) and return a Future for its result"""
+    future = Future()
+
+    def call():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(handler(cmd, args))
+        except Exception as e:
+            future.set_exception(e)
+
+    post(call)
+    return future
@@ -0,0 +1,277 @@
+"""Crossfading playback on two pygame mixer channels.
+
+Tracks are decoded to Sound objects on a background thread ahead of time
+and played on one of two reserved channels. The engine runs its own
+scheduler thread, so fades start on time regardless of how busy the Tk
+loop is: when the playing track has `overlap` seconds left, the armed
+next track starts on the other channel and the two are ramped with
+equal-power curves.
+"""
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pygame
+from pygame import mixer
+
+TICK = 0.02  # Seconds between volume ramp steps
+
+
+class _Track:
+    """A decoded (or decoding) track and its playback clock"""
+    def __init__(self, path, future, volume):
+        self.path = path
+        self.future = future
+        self.volume = volume
+        self.channel = None
+        self.length = 0
+        self.offset = 0  # Position in seconds where playback started
+        self.started_at = None  # Monotonic start time, shifted by pauses
+        self.ended = False
+
+    def position(self, now):
+        if self.started_at is None:
+            return self.offset
+        return self.offset + max(0.0, now - self.started_at)
+
+
+class CrossfadeEngine:
+    """Plays tracks on two channels, crossfading into an armed next track"""
+    def __init__(self, on_event, open_audio=None, overlap=5.0):
+        # on_event(kind, path, session) is called from the engine thread
+        # with "advanced" when a fade into the armed track starts, "ended"
+        # when a track finished with nothing to fade into, or "error".
+        # session identifies the play() call, so stale events can be ignored
+        self.on_event = on_event
+        self.open_audio = open_audio or (lambda path: path)
+        self.overlap = overlap
+
+        mixer.set_reserved(2)
+        self.channels = [mixer.Channel(0), mixer.Channel(1)]
+        self.decoder = ThreadPoolExecutor(max_workers=1, thread_name_prefix="crossfade-decode")
+        self.decoding = {}  # path -> Future of a decoded Sound
+
+        self.cond = threading.Condition(threading.RLock())
+        self.active = None
+        self.outgoing = None
+        self.armed = None
+        self.fade_started = None
+        self.fade_length = 0
+        self.paused_at = None
+        self.session = 0
+        self.closed = False
+
+        self.thread = threading.Thread(target=self._run, name="crossfade", daemon=True)
+        self.thread.start()
+
+    # Decoding
+    def _decode(self, path):
+        """Future for a decoded Sound, reusing one already in progress"""
+        future = self.decoding.get(path)
+        if future is None:
+            future = self.decoder.submit(lambda: mixer.Sound(self.open_audio(path)))
+            self.decoding[path] = future
+            self._prune_decoded()
+        return future
+
+    def _prune_decoded(self):
+        """Drop decoded sounds no longer playing or armed"""
+        keep = {track.path for track in (self.active, self.outgoing, self.armed) if track}
+        for path in list(self.decoding):
+            if path not in keep and len(self.decoding) > 3:
+                del self.decoding[path]
+
+    # Controls (any thread)
+    def play(self, path, volume, start=0.0):
+        """Stop everything and play a track as soon as it is decoded"""
+        with self.cond:
+            self._stop_channels()
+            self.session += 1
+            self.active = _Track(path, self._decode(path), volume)
+            self.active.offset = start
+            if self.armed and self.armed.path == path:
+                self.armed = None
+            self.paused_at = None
+            self.cond.notify_all()
+
+    def arm(self, path, volume):
+        """Set the track to fade into next and start decoding it"""
+        with self.cond:
+            if path is None:
+                self.armed = None
+            elif not self.armed or self.armed.path != path:
+                self.armed = _Track(path, self._decode(path), volume)
+            else:
+                self.armed.volume = volume
+
+    def stop(self):
+        with self.cond:
+            self._stop_channels()
+            self.session += 1
+            self.active = self.armed = None
+            self.paused_at = None
+
+    def pause(self):
+        with self.cond:
+            if self.paused_at is None:
+                self.paused_at = time.monotonic()
+                for channel in self.channels:
+                    channel.pause()
+
+    def unpause(self):
+        with self.cond:
+            if self.paused_at is None:
+                return
+            # Shift clocks so paused time does not count
+            delta = time.monotonic() - self.paused_at
+            for track in (self.active, self.outgoing):
+                if track and track.started_at is not None:
+                    track.started_at += delta
+            if self.fade_started is not None:
+                self.fade_started += delta
+            self.paused_at = None
+            for channel in self.channels:
+                channel.unpause()
+            self.cond.notify_all()
+
+    def set_volume(self, volume):
+        """Change the playing track's volume"""
+        with self.cond:
+            if self.active:
+                self.active.volume = volume
+                if self.fade_started is None and self.active.channel:
+                    self.active.channel.set_volume(volume)
+
+    def seek(self, seconds):
+        """Restart the playing track at a position; needs NumPy"""
+        with self.cond:
+            track = self.active
+            if not track or not track.future.done() or track.future.exception():
+                return False
+            try:
+                sound = self._slice(track.future.result(), seconds)
+            except (ImportError, pygame.error, ValueError):
+                return False
+
+            self._stop_channels()
+            track.offset = seconds
+            track.ended = False
+            self._start(track, sound, track.volume)
+            if self.paused_at is not None:
+                track.channel.pause()
+                track.started_at = self.paused_at
+            return True
+
+    def position(self):
+        with self.cond:
+            if not self.active:
+                return 0.0
+            return self.active.position(self.paused_at or time.monotonic())
+
+    def length(self):
+        """Exact length of the playing track once decoded, else 0"""
+        with self.cond:
+            return self.active.length if self.active else 0
+
+    def shutdown(self):
+        with self.cond:
+            self.closed = True
+            self._stop_channels()
+            self.cond.notify_all()
+        self.thread.join(timeout=1)
+        self.decoder.shutdown(wait=False, cancel_futures=True)
+        mixer.set_reserved(0)
+
+    # Engine thread
+    def _stop_channels(self):
+        for channel in self.channels:
+            channel.stop()
+        self.outgoing = None
+        self.fade_started = None
+
+    def _free_channel(self):
+        busy = self.outgoing.channel if self.outgoing else None
+        return self.channels[1] if busy is self.channels[0] else self.channels[0]
+
+    @staticmethod
+    def _slice(sound, seconds):
+        """A copy of a sound starting at the given offset"""
+        from pygame import sndarray
+        frequency = mixer.get_init()[0]
+        samples = sndarray.samples(sound)
+        start = min(len(samples), max(0, int(seconds * frequency)))
+        return sndarray.make_sound(samples[start:].copy())
+
+    def _start(self, track, sound, volume):
+        track.channel = self._free_channel()
+        track.channel.set_volume(volume)
+        track.channel.play(sound)
+        track.started_at = time.monotonic()
+
+    def _run(self):
+        with self.cond:
+            while not self.closed:
+                try:
+                    self._step(time.monotonic())
+                except Exception:
+                    pass  # Never let the scheduler thread die
+                idle = not self.active and not self.outgoing
+                self.cond.wait(None if idle else TICK)
+
+    def _step(self, now):
+        if self.paused_at is not None:
+            return
+
+        track = self.active
+        # Start a requested track once it is decoded
+        if track and track.started_at is None and not track.ended:
+            if not track.future.done():
+                return
+            try:
+                sound = track.future.result()
+                track.length = sound.get_length()
+                if track.offset:
+                    sound = self._slice(sound, track.offset)
+                self._start(track, sound, track.volume)
+            except Exception:
+                track.ended = True
+                self.on_event("error", track.path, self.session)
+                return
+
+        if self.fade_started is not None:
+            self._ramp(now)
+        elif track and track.started_at is not None and not track.ended:
+            remaining = track.length - track.position(now)
+            armed = self.armed
+            if (armed and remaining <= self.overlap and armed.future.done()
+                    and not armed.future.exception()):
+                self._begin_fade(now, armed, max(TICK, remaining))
+            elif remaining <= 0 or not track.channel.get_busy():
+                track.ended = True
+                self.on_event("ended", track.path, self.session)
+
+    def _begin_fade(self, now, incoming, length):
+        """Start the armed track silently and hand playback over to it"""
+        self.outgoing = self.active
+        self.active = incoming
+        self.armed = None
+        sound = incoming.future.result()
+        incoming.length = sound.get_length()
+        self._start(incoming, sound, 0.0)
+        self.fade_started = now
+        self.fade_length = length
+        self.on_event("advanced", incoming.path, self.session)
+
+    def _ramp(self, now):
+        """Equal-power volume ramp between outgoing and incoming tracks"""
+        t = min(1.0, (now - self.fade_started) / self.fade_length)
+        if self.outgoing:
+            self.outgoing.channel.set_volume(self.outgoing.volume * math.cos(t * math.pi / 2))
+        self.active.channel.set_volume(self.active.volume * math.sin(t * math.pi / 2))
+        if t >= 1.0:
+            if self.outgoing:
+                self.outgoing.channel.stop()
+            self.outgoing = None
+            self.fade_started = None
+            self._prune_decoded()
@@ -0,0 +1,139 @@
+"""Cached, batched checks of whether song files are available.
+
+Checking every song with os.path.exists on each save or load is slow on
+network shares, where each stat is a round trip. FileStatus checks paths
+in parallel batches on a thread pool, remembers the answers for a TTL and
+refreshes stale ones in the background when they are next looked at, so
+callers on the UI thread rarely wait on the file system.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_TTL = 120.0  # Seconds before a cached answer is checked again
+REFRESH_BATCH = 32  # Paths per background refresh job
+
+
+class FileStatus:
+    """Path -> available cache with parallel batch checks and lazy refresh"""
+    def __init__(self, on_change=None, ttl=DEFAULT_TTL, workers=16):
+        self.on_change = on_change  # Called with {path: available} for changed paths, from a worker thread
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.entries = {}  # path -> (available, checked_at)
+        self.refreshing = set()
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="file-status")
+
+        # Statistics
+        self.checks = 0
+        self.hits = 0
+
+    def _fresh(self, path, now):
+        entry = self.entries.get(path)
+        return entry is not None and now - entry[1] < self.ttl
+
+    def _store(self, results, now):
+        """Cache check results, returning the paths whose answer changed"""
+        # Paths never checked before count as available, the UI's default
+        changed = {}
+        with self.lock:
+            for path, available in results.items():
+                entry = self.entries.get(path)
+                if (entry[0] if entry else True) != available:
+                    changed[path] = available
+                self.entries[path] = (available, now)
+            self.checks += len(results)
+        return changed
+
+    def _check(self, paths):
+        """Check paths in parallel and return {path: available}"""
+        if len(paths) == 1:
+            return {paths[0]: os.path.exists(paths[0])}
+        return dict(zip(paths, self.executor.map(os.path.exists, paths)))
+
+    def check_many(self, paths, recheck_missing=False):
+        """Availability of each path, checking uncached or stale ones now
+
+        With recheck_missing, paths cached as unavailable are checked again
+        too, for when the user asks for a file that may have come back.
+        """
+        now = time.monotonic()
+        with self.lock:
+            stale = list({
+                path for path in paths
+                if not self._fresh(path, now) or (recheck_missing and not self.entries[path][0])
+            })
+            self.hits += len(paths) - len(stale)
+        if stale:
+            changed = self._store(self._check(stale), now)
+            if changed and self.on_change:
+                self.on_change(changed)
+        with self.lock:
+            return {path: self.entries[path][0] for path in paths}
+
+    def available(self, path, recheck_missing=False):
+        """Whether a path is available, checking it now if the answer is stale"""
+        return self.check_many([path], recheck_missing)[path]
+
+    def lookup(self, paths):
+        """Cached availability without waiting (None if never checked)
+
+        Stale and unknown paths are re-checked in the background and any
+        changed answers are reported through on_change.
+        """
+        now = time.monotonic()
+        result = {}
+        stale = []
+        with self.lock:
+            for path in paths:
+                entry = self.entries.get(path)
+                result[path] = entry[0] if entry else None
+                if not self._fresh(path, now) and path not in self.refreshing:
+                    stale.append(path)
+            self.refreshing.update(stale)
+        # Several jobs so the pool checks batches in parallel
+        for i in range(0, len(stale), REFRESH_BATCH):
+            batch = stale[i:i + REFRESH_BATCH]
+            try:
+                self.executor.submit(self._refresh, batch)
+            except RuntimeError:
+                with self.lock:
+                    self.refreshing.difference_update(stale[i:])
+                break  # Shut down
+        return result
+
+    def is_missing(self, path):
+        """True only if the path is already known to be unavailable"""
+        with self.lock:
+            entry = self.entries.get(path)
+        return entry is not None and not entry[0]
+
+    def mark(self, path, available):
+        """Record an availability learned elsewhere, e.g. a failed load"""
+        changed = self._store({path: available}, time.monotonic())
+        if changed and self.on_change:
+            self.on_change(changed)
+
+    def _refresh(self, paths):
+        try:
+            results = {path: os.path.exists(path) for path in paths}
+            changed = self._store(results, time.monotonic())
+        finally:
+            with self.lock:
+                self.refreshing.difference_update(paths)
+        if changed and self.on_change:
+            self.on_change(changed)
+
+    def stats(self):
+        with self.lock:
+            missing = sum(1 for available, _ in self.entries.values() if not available)
+            return {
+                'paths': len(self.entries),
+                'missing': missing,
+                'checks': self.checks,
+                'hits': self.hits
+            }
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,146 @@
+"""Background loudness analysis for ReplayGain-style volume normalization.
+
+Files are decoded through pygame and measured with NumPy in a process pool,
+so analysis never competes with the Tk thread or playback. NumPy is
+optional; without it the analyzer reports itself unavailable.
+"""
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+REFERENCE_DB = -18.0  # Target loudness in dBFS
+WINDOW_SECONDS = 0.05
+PERCENTILE = 95  # ReplayGain loudness percentile of window energies
+MAX_GAIN_DB = 12.0
+
+
+def init_worker():
+    """Set up pygame's mixer in a worker process without an audio device"""
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+    import pygame
+    pygame.mixer.init()
+
+
+def analyze_file(path):
+    """Decode a file and return its (gain_db, peak) normalization values"""
+    import pygame
+    sound = pygame.mixer.Sound(path)
+    samples = pygame.sndarray.array(sound)
+    frequency, size, channels = pygame.mixer.get_init()
+    del sound
+
+    # Normalize to [-1, 1] floats and fold channels together
+    scale = float(2 ** (abs(size) - 1))
+    data = samples.astype(np.float32) / scale
+    if data.ndim > 1:
+        data = data.reshape(len(data), -1)
+    else:
+        data = data.reshape(-1, 1)
+
+    peak = float(np.max(np.abs(data))) if data.size else 0.0
+    if peak == 0.0:
+        return 0.0, 0.0
+
+    # Mean square energy over short windows, averaged across channels
+    window = max(1, int(frequency * WINDOW_SECONDS))
+    frames = (len(data) // window) * window
+    if frames:
+        blocks = data[:frames].reshape(-1, window, data.shape[1])
+        energy = np.mean(np.square(blocks, dtype=np.float64), axis=(1, 2))
+    else:
+        energy = np.mean(np.square(data, dtype=np.float64), axis=(0, 1), keepdims=True).ravel()
+
+    loudness = float(np.percentile(energy, PERCENTILE))
+    loudness_db = 10 * np.log10(max(loudness, 1e-10))
+    gain_db = REFERENCE_DB - loudness_db
+
+    # Never boost past full scale
+    gain_db = min(gain_db, MAX_GAIN_DB, -20 * np.log10(peak))
+    return float(gain_db), peak
+
+
+def gain_factor(gain_db):
+    """Linear volume factor for a gain in dB"""
+    return 10 ** (gain_db / 20.0)
+
+
+class LoudnessAnalyzer:
+    """Feeds songs to a process pool a few at a time and reports results"""
+    def __init__(self, on_result, max_workers=1):
+        self.on_result = on_result  # Called as on_result(path, gain_db, peak) from a pool thread
+        self.available = np is not None
+        self.max_workers = max_workers
+        self.executor = None
+        self.waiting = deque()
+        self.queued = set()
+        self.in_flight = set()
+        self.failed = set()
+
+    def request(self, path, priority=False):
+        """Queue a file for analysis; priority requests jump the queue"""
+        if not self.available or path in self.in_flight or path in self.failed:
+            return
+        if path in self.queued:
+            if not priority:
+                return
+            self.waiting.remove(path)
+        self.queued.add(path)
+        if priority:
+            self.waiting.appendleft(path)
+        else:
+            self.waiting.append(path)
+        self._submit()
+
+    def _submit(self):
+        """Keep the pool busy without queuing everything up front"""
+        if self.executor is None:
+            try:
+                # Spawn rather than fork the Tk/SDL process
+                self.executor = ProcessPoolExecutor(
+                    self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=init_worker
+                )
+            except (OSError, NotImplementedError):
+                self.available = False
+                return
+
+        while self.waiting and len(self.in_flight) < self.max_workers * 2:
+            path = self.waiting.popleft()
+            self.queued.discard(path)
+            self.in_flight.add(path)
+            try:
+                future = self.executor.submit(analyze_file, path)
+            except RuntimeError:
+                self.in_flight.discard(path)
+                return  # Pool shut down
+            future.add_done_callback(lambda f, path=path: self._done(path, f))
+
+    def _done(self, path, future):
+        """Collect a finished analysis (runs on a pool thread)"""
+        try:
+            gain_db, peak = future.result()
+        except Exception:
+            gain_db = peak = None
+        self.on_result(path, gain_db, peak)
+
+    def finished(self, path, ok):
+        """Mark a result as handled and top up the pool (call from the UI thread)"""
+        self.in_flight.discard(path)
+        if not ok:
+            self.failed.add(path)
+        self._submit()
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+        self.waiting.clear()
+        self.queued.clear()
@@ -0,0 +1,235 @@
+"""Append-only play history with pre-aggregated listening statistics.
+
+Plays are queued by the UI thread and written in batches by a background
+thread. Per-song counters are kept in memory and snapshotted next to the
+log, so startup only replays the plays logged since the last snapshot and
+top-N queries scale with the number of songs rather than plays.
+"""
+import heapq
+import json
+import os
+import pickle
+import queue
+import threading
+import time
+from collections import Counter, deque
+
+
+class PlayHistory:
+    """Play log plus counters for most played, most skipped and recent songs"""
+    def __init__(self, log_path="play_history.log", stats_path="play_stats.pkl",
+                 batch_delay=1.0, snapshot_every=500, recent_size=200, on_update=None):
+        self.log_path = log_path
+        self.stats_path = stats_path
+        self.batch_delay = batch_delay        # Seconds to gather a write batch
+        self.snapshot_every = snapshot_every  # Plays between stats snapshots
+        self.on_update = on_update  # Called with the set of paths whose counters changed, from the writer thread
+
+        # Aggregates, owned by the writer thread and read under the lock
+        self.lock = threading.Lock()
+        self.plays = Counter()
+        self.skips = Counter()
+        self.listened = Counter()  # Seconds listened per song
+        self.last_played = {}
+        self.titles = {}
+        self.recent = deque(maxlen=recent_size)
+        self.total_plays = 0
+        self.log_offset = 0  # Bytes of the log covered by the aggregates
+        self._replayed = 0  # Plays replayed from the log since the snapshot
+
+        self._load()
+
+        self.queue = queue.Queue()
+        self.writer = threading.Thread(target=self._write_loop, name="play-history", daemon=True)
+        self.writer.start()
+
+    # Recording
+    def record(self, song, playlist_name, started, listened, skipped):
+        """Queue a finished play; never blocks on disk"""
+        self.queue.put({
+            "path": song.filepath,
+            "title": song.title,
+            "playlist": playlist_name,
+            "started": round(started, 3),
+            "listened": round(max(0.0, listened), 3),
+            "skipped": bool(skipped)
+        })
+
+    def close(self):
+        """Flush queued plays and stop the writer thread"""
+        if self.writer.is_alive():
+            self.queue.put(None)
+            self.writer.join()
+
+    def _apply(self, entry):
+        """Fold one play into the aggregates (lock must be held)"""
+        path = entry["path"]
+        self.plays[path] += 1
+        if entry["skipped"]:
+            self.skips[path] += 1
+        self.listened[path] += entry["listened"]
+        self.last_played[path] = entry["started"]
+        self.titles[path] = entry["title"]
+        self.recent.append(path)
+        self.total_plays += 1
+
+    def _write_loop(self):
+        """Write queued plays in batches and snapshot the aggregates"""
+        since_snapshot = self._replayed
+        running = True
+        while running:
+            entry = self.queue.get()
+            if entry is None:
+                break
+
+            # Gather whatever else arrives shortly into the same write
+            batch = [entry]
+            deadline = time.monotonic() + self.batch_delay
+            while True:
+                timeout = deadline - time.monotonic()
+                try:
+                    entry = self.queue.get(timeout=timeout) if timeout > 0 else self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if entry is None:
+                    running = False
+                    break
+                batch.append(entry)
+
+            try:
+                data = "".join(json.dumps(e, separators=(",", ":")) + "\n" for e in batch)
+                with open(self.log_path, "a", encoding="utf-8") as f:
+                    f.write(data)
+                    offset = f.tell()
+            except OSError:
+                continue  # Keep the plays out of the aggregates if unlogged
+
+            with self.lock:
+                for e in batch:
+                    self._apply(e)
+                self.log_offset = offset
+            if self.on_update:
+                self.on_update({e["path"] for e in batch})
+
+            since_snapshot += len(batch)
+            if since_snapshot >= self.snapshot_every:
+                self._snapshot()
+                since_snapshot = 0
+
+        if since_snapshot:
+            self._snapshot()
+
+    # Persistence
+    def _snapshot(self):
+        """Atomically save the aggregates together with the log offset"""
+        with self.lock:
+            data = {
+                "plays": dict(self.plays),
+                "skips": dict(self.skips),
+                "listened": dict(self.listened),
+                "last_played": dict(self.last_played),
+                "titles": dict(self.titles),
+                "recent": list(self.recent),
+                "total_plays": self.total_plays,
+                "log_offset": self.log_offset
+            }
+        tmp_path = self.stats_path + ".tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                pickle.dump(data, f)
+            os.replace(tmp_path, self.stats_path)
+        except OSError:
+            pass
+
+    def _load(self):
+        """Load the last snapshot and replay plays logged after it"""
+        try:
+            log_size = os.path.getsize(self.log_path)
+        except OSError:
+            log_size = 0
+
+        try:
+            with open(self.stats_path, "rb") as f:
+                data = pickle.load(f)
+            fields = [data[key] for key in ("plays", "skips", "listened", "last_played",
+                                            "titles", "recent", "total_plays", "log_offset")]
+        except Exception:
+            fields = None  # Missing or unreadable snapshot; rebuild from the log
+
+        if fields and fields[-1] <= log_size:
+            plays, skips, listened, last_played, titles, recent, total, offset = fields
+            self.plays.update(plays)
+            self.skips.update(skips)
+            self.listened.update(listened)
+            self.last_played.update(last_played)
+            self.titles.update(titles)
+            self.recent.extend(recent)
+            self.total_plays = total
+            self.log_offset = offset
+
+        if log_size > self.log_offset:
+            with open(self.log_path, "r", encoding="utf-8", errors="replace") as f:
+                f.seek(self.log_offset)
+                for line in f:
+                    try:
+                        self._apply(json.loads(line))
+                        self._replayed += 1
+                    except (ValueError, KeyError, TypeError):
+                        continue  # Torn or corrupt line
+            self.log_offset = log_size
+
+    # Queries
+    def play_count(self, path):
+        with self.lock:
+            return self.plays.get(path, 0)
+
+    def skip_count(self, path):
+        with self.lock:
+            return self.skips.get(path, 0)
+
+    def most_played(self, n=10):
+        """Top n (path, plays) pairs"""
+        with self.lock:
+            return heapq.nlargest(n, self.plays.items(), key=lambda item: item[1])
+
+    def most_skipped(self, n=10):
+        """Top n (path, skips) pairs"""
+        with self.lock:
+            return heapq.nlargest(n, self.skips.items(), key=lambda item: item[1])
+
+    def recently_played(self, n=10):
+        """Up to n distinct paths, most recent first"""
+        with self.lock:
+            recent = list(self.recent)
+        paths = []
+        for path in reversed(recent):
+            if path not in paths:
+                paths.append(path)
+                if len(paths) == n:
+                    break
+        return paths
+
+    def title(self, path):
+        with self.lock:
+            return self.titles.get(path, os.path.basename(path))
+
+    def sort_key(self, stat):
+        """Key function ordering songs by 'plays', 'skips', 'listened' or 'last_played'"""
+        counters = {
+            "plays": self.plays,
+            "skips": self.skips,
+            "listened": self.listened,
+            "last_played": self.last_played
+        }[stat]
+        def key(song):
+            with self.lock:
+                return counters.get(song.filepath, 0)
+        return key
+
+    def shuffle_weight(self, song):
+        """Shuffle weight favouring songs that are played through, not skipped"""
+        with self.lock:
+            plays = self.plays.get(song.filepath, 0)
+            skips = self.skips.get(song.filepath, 0)
+        completed = plays - skips
+        return min(4.0, max(0.25, (1 + completed) / (1 + 2 * skips)))
@@ -0,0 +1,38 @@
+"""The "Up Next" queue of songs to play before the playlist continues.
+
+Queued songs are independent of playlist order: they can come from any
+playlist, work the same with shuffle on or off, and queueing or playing
+them never reorders or changes a playlist. Every operation is O(1).
+"""
+from collections import deque
+
+
+class PlayQueue:
+    """Deque of (song, playlist name) entries waiting to be played"""
+    def __init__(self, entries=()):
+        self.entries = deque(entries)
+
+    def play_next(self, song, playlist_name=None):
+        """Queue a song in front of everything else"""
+        self.entries.appendleft((song, playlist_name))
+
+    def append(self, song, playlist_name=None):
+        """Queue a song after everything else"""
+        self.entries.append((song, playlist_name))
+
+    def dequeue(self):
+        """Remove and return the first (song, playlist name), or None"""
+        return self.entries.popleft() if self.entries else None
+
+    def peek(self):
+        """First (song, playlist name) without removing it, or None"""
+        return self.entries[0] if self.entries else None
+
+    def clear(self):
+        self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        return iter(self.entries)
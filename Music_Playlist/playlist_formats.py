@@ -0,0 +1,288 @@
+"""Streaming import/export for M3U/M3U8, PLS and XSPF playlist files.
+
+Readers are generators yielding one PlaylistEntry at a time and writers
+consume any iterable of songs, so neither side ever holds a whole playlist
+file in memory.
+"""
+import os
+import xml.etree.ElementTree as ET
+from urllib.parse import unquote, urlparse
+from urllib.request import pathname2url, url2pathname
+from xml.sax.saxutils import escape
+
+XSPF_NS = "http://xspf.org/ns/0/"
+
+# Element tags with and without the XSPF namespace
+_TRACK_TAGS = {"track", "{%s}track" % XSPF_NS}
+_TRACK_FIELDS = {}
+for _name in ("location", "title", "creator", "duration"):
+    _TRACK_FIELDS[_name] = _TRACK_FIELDS["{%s}%s" % (XSPF_NS, _name)] = _name
+
+# Filetypes for tkinter file dialogs
+PLAYLIST_FILETYPES = [
+    ("Playlist Files", "*.m3u *.m3u8 *.pls *.xspf"),
+    ("M3U Playlist", "*.m3u *.m3u8"),
+    ("PLS Playlist", "*.pls"),
+    ("XSPF Playlist", "*.xspf"),
+]
+
+
+class PlaylistEntry:
+    """A single track read from a playlist file"""
+    __slots__ = ("path", "title", "artist", "duration")
+
+    def __init__(self, path, title=None, artist=None, duration=None):
+        self.path = path
+        self.title = title
+        self.artist = artist
+        self.duration = duration  # Seconds, or None if unknown
+
+
+def _split_artist_title(text):
+    """Split an 'Artist - Title' display string"""
+    text = text.strip()
+    if not text:
+        return None, None
+    if " - " in text:
+        artist, title = text.split(" - ", 1)
+        return artist.strip() or None, title.strip() or None
+    return None, text
+
+
+def _parse_duration(value, scale=1.0):
+    """Parse a duration field, returning seconds or None if unknown"""
+    try:
+        seconds = float(value) / scale
+    except (TypeError, ValueError):
+        return None
+    return seconds if seconds > 0 else None
+
+
+def _location_to_path(location, base_dir, uri=False):
+    """Resolve a playlist location (path or file URI) to a local path
+
+    With uri, the location is a URI reference (as in XSPF), so relative
+    references are percent-decoded too.
+    """
+    location = location.strip()
+    parsed = urlparse(location)
+    if parsed.scheme == "file":
+        path = url2pathname(parsed.path)
+        if parsed.netloc and parsed.netloc != "localhost":
+            path = "//" + parsed.netloc + path  # UNC share
+        return os.path.normpath(path)
+    if len(parsed.scheme) > 1:
+        return None  # Remote streams (http, rtsp, ...) are not playable
+    if uri:
+        location = unquote(location)
+    # Plain path; a one-letter "scheme" is a Windows drive letter
+    if not parsed.scheme and not os.path.isabs(location):
+        location = os.path.join(base_dir, location)
+    return os.path.normpath(location)
+
+
+def _path_to_uri(path):
+    """Convert a local path to a file URI"""
+    url = pathname2url(os.path.abspath(path))
+    return "file:" + url if url.startswith("///") else "file://" + url
+
+
+def _song_display(song):
+    """Display string used by EXTINF and PLS titles"""
+    if song.artist and song.artist != "Unknown Artist":
+        return f"{song.artist} - {song.title}"
+    return song.title
+
+
+def _song_seconds(song):
+    """Known duration of a song in whole seconds, or -1"""
+    duration = getattr(song, "known_duration", None)
+    return int(round(duration)) if duration else -1
+
+
+# Readers
+def read_m3u(path):
+    """Yield entries from an M3U/M3U8 file, reusing EXTINF metadata"""
+    base_dir = os.path.dirname(os.path.abspath(path))
+    encoding = "utf-8-sig" if path.lower().endswith(".m3u8") else "utf-8"
+    pending = None  # EXTINF metadata for the next location line
+
+    with open(path, "r", encoding=encoding, errors="replace") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("#"):
+                if line.upper().startswith("#EXTINF:"):
+                    info = line[8:]
+                    length, _, display = info.partition(",")
+                    # Drop any key="value" attributes after the length
+                    length = length.split(" ", 1)[0]
+                    artist, title = _split_artist_title(display)
+                    pending = (artist, title, _parse_duration(length))
+                continue
+
+            song_path = _location_to_path(line, base_dir)
+            if song_path:
+                artist, title, duration = pending or (None, None, None)
+                yield PlaylistEntry(song_path, title, artist, duration)
+            pending = None
+
+
+def read_pls(path):
+    """Yield entries from a PLS file"""
+    base_dir = os.path.dirname(os.path.abspath(path))
+    index = None
+    fields = {}
+
+    def flush():
+        song_path = fields.get("file") and _location_to_path(fields["file"], base_dir)
+        if song_path:
+            artist, title = _split_artist_title(fields.get("title", ""))
+            return PlaylistEntry(song_path, title, artist,
+                                 _parse_duration(fields.get("length")))
+        return None
+
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            key, sep, value = line.strip().partition("=")
+            if not sep:
+                continue
+            key = key.strip().lower()
+            for field in ("file", "title", "length"):
+                if key.startswith(field) and key[len(field):].isdigit():
+                    number = int(key[len(field):])
+                    if number != index:
+                        # Entries are grouped by number; emit the finished one
+                        entry = flush() if index is not None else None
+                        if entry:
+                            yield entry
+                        index = number
+                        fields = {}
+                    fields[field] = value.strip()
+                    break
+
+    if index is not None:
+        entry = flush()
+        if entry:
+            yield entry
+
+
+def read_xspf(path):
+    """Yield entries from an XSPF file, one <track> element at a time"""
+    base_dir = os.path.dirname(os.path.abspath(path))
+    parents = []  # Open elements, so finished tracks can be detached
+
+    for event, elem in ET.iterparse(path, events=("start", "end")):
+        if event == "start":
+            parents.append(elem)
+            continue
+        parents.pop()
+        if elem.tag not in _TRACK_TAGS:
+            continue
+
+        values = {}
+        for child in elem:
+            name = _TRACK_FIELDS.get(child.tag)
+            if name and name not in values:
+                values[name] = (child.text or "").strip()
+
+        song_path = values.get("location") and _location_to_path(values["location"], base_dir, uri=True)
+        if song_path:
+            yield PlaylistEntry(
+                song_path,
+                values.get("title") or None,
+                values.get("creator") or None,
+                _parse_duration(values.get("duration"), scale=1000.0),
+            )
+
+        # Free parsed tracks so memory stays flat on huge files
+        elem.clear()
+        if parents:
+            parents[-1].remove(elem)
+
+
+# Writers
+def write_m3u(path, songs):
+    """Write songs as an extended M3U/M3U8 file, returning the entry count"""
+    count = 0
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        f.write("#EXTM3U\n")
+        for song in songs:
+            f.write(f"#EXTINF:{_song_seconds(song)},{_song_display(song)}\n")
+            f.write(f"{song.filepath}\n")
+            count += 1
+    return count
+
+
+def write_pls(path, songs):
+    """Write songs as a PLS file, returning the entry count"""
+    count = 0
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        f.write("[playlist]\n")
+        for song in songs:
+            count += 1
+            f.write(f"File{count}={song.filepath}\n")
+            f.write(f"Title{count}={_song_display(song)}\n")
+            f.write(f"Length{count}={_song_seconds(song)}\n")
+        f.write(f"NumberOfEntries={count}\n")
+        f.write("Version=2\n")
+    return count
+
+
+def write_xspf(path, songs, title=None):
+    """Write songs as an XSPF file, returning the entry count"""
+    count = 0
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        f.write(f'<playlist version="1" xmlns="{XSPF_NS}">\n')
+        if title:
+            f.write(f"  <title>{escape(title)}</title>\n")
+        f.write("  <trackList>\n")
+        for song in songs:
+            f.write("    <track>\n")
+            f.write(f"      <location>{escape(_path_to_uri(song.filepath))}</location>\n")
+            f.write(f"      <title>{escape(song.title)}</title>\n")
+            if song.artist and song.artist != "Unknown Artist":
+                f.write(f"      <creator>{escape(song.artist)}</creator>\n")
+            seconds = _song_seconds(song)
+            if seconds > 0:
+                f.write(f"      <duration>{seconds * 1000}</duration>\n")
+            f.write("    </track>\n")
+            count += 1
+        f.write("  </trackList>\n")
+        f.write("</playlist>\n")
+    return count
+
+
+READERS = {
+    ".m3u": read_m3u,
+    ".m3u8": read_m3u,
+    ".pls": read_pls,
+    ".xspf": read_xspf,
+}
+
+WRITERS = {
+    ".m3u": write_m3u,
+    ".m3u8": write_m3u,
+    ".pls": write_pls,
+    ".xspf": write_xspf,
+}
+
+
+def read_playlist(path):
+    """Yield entries from a playlist file, picking the reader by extension"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in READERS:
+        raise ValueError(f"Unsupported playlist format: {ext or path}")
+    return READERS[ext](path)
+
+
+def write_playlist(path, songs, title=None):
+    """Write songs to a playlist file, picking the writer by extension"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in WRITERS:
+        raise ValueError(f"Unsupported playlist format: {ext or path}")
+    if ext == ".xspf":
+        return write_xspf(path, songs, title)
+    return WRITERS[ext](path, songs)
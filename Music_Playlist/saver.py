@@ -0,0 +1,130 @@
+"""Coalescing, atomic background saves.
+
+The UI thread hands over a cheap snapshot on every change. A writer thread
+waits for bursts of changes to settle, serializes only the latest snapshot
+and replaces the target file atomically through a temporary file, so a
+crash mid-write never leaves a truncated file behind.
+"""
+import os
+import pickle
+import threading
+import time
+from collections import deque
+
+
+class BackgroundSaver:
+    """Debounced writer of pickled snapshots on a background thread"""
+    def __init__(self, path, serialize, on_error=None, delay=0.5, max_delay=2.0):
+        self.path = path
+        self.serialize = serialize  # snapshot -> picklable data, run off the UI thread
+        self.on_error = on_error    # Called with the exception from the writer thread
+        self.delay = delay          # Quiet time before writing a burst
+        self.max_delay = max_delay  # Upper bound on how long a change waits
+
+        self.cond = threading.Condition()
+        self.pending = None
+        self.first_submit = None
+        self.last_submit = None
+        self.writing = False
+        self.flush_requested = False
+        self.closed = False
+
+        # Measurements
+        self.submits = 0
+        self.writes = 0
+        self.failures = 0
+        self.latencies = deque(maxlen=100)  # Seconds from first change to written
+
+        self.thread = threading.Thread(target=self._run, name="playlist-saver", daemon=True)
+        self.thread.start()
+
+    def submit(self, snapshot):
+        """Schedule a snapshot to be saved, replacing any not yet written"""
+        with self.cond:
+            now = time.monotonic()
+            self.pending = snapshot
+            if self.first_submit is None:
+                self.first_submit = now
+            self.last_submit = now
+            self.submits += 1
+            self.cond.notify_all()
+
+    def flush(self, timeout=None):
+        """Write any pending snapshot now and wait for it to finish"""
+        with self.cond:
+            if self.pending is None and not self.writing:
+                return True
+            self.flush_requested = True
+            self.cond.notify_all()
+            return self.cond.wait_for(lambda: self.pending is None and not self.writing, timeout)
+
+    def close(self, timeout=None):
+        """Flush pending work and stop the writer thread"""
+        self.flush(timeout)
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+        self.thread.join(timeout)
+
+    def stats(self):
+        """Save counts, coalescing ratio and latency figures"""
+        with self.cond:
+            latencies = list(self.latencies)
+            return {
+                'submits': self.submits,
+                'writes': self.writes,
+                'failures': self.failures,
+                'coalescing_ratio': self.submits / self.writes if self.writes else 0.0,
+                'avg_latency': sum(latencies) / len(latencies) if latencies else 0.0,
+                'max_latency': max(latencies) if latencies else 0.0
+            }
+
+    def _run(self):
+        while True:
+            with self.cond:
+                self.cond.wait_for(lambda: self.pending is not None or self.closed)
+                if self.pending is None:
+                    return  # Closed with nothing left to write
+
+                # Wait for the burst to settle, but not past max_delay
+                while not self.closed and not self.flush_requested:
+                    due = min(self.last_submit + self.delay, self.first_submit + self.max_delay)
+                    remaining = due - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.cond.wait(remaining)
+
+                snapshot = self.pending
+                first_submit = self.first_submit
+                self.pending = None
+                self.first_submit = None
+                self.writing = True
+
+            try:
+                self._write(self.serialize(snapshot))
+                failed = None
+            except Exception as e:
+                failed = e
+
+            with self.cond:
+                self.writing = False
+                if failed is None:
+                    self.writes += 1
+                    self.latencies.append(time.monotonic() - first_submit)
+                else:
+                    self.failures += 1
+                if self.pending is None:
+                    self.flush_requested = False
+                self.cond.notify_all()
+
+            if failed is not None and self.on_error:
+                self.on_error(failed)
+
+    def _write(self, data):
+        """Replace the target file atomically"""
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
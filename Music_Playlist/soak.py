@@ -0,0 +1,585 @@
+"""Headless soak test for the music player.
+
+Runs MusicPlayerApp against stand-in Tk widgets and a fake pygame mixer
+driven by a simulated clock, then scripts hours of listening and editing
+(next, previous, shuffle, sort, queue, add, remove, move, pause) in seconds of real
+time. Playback advances through the app's own root.after timers, so the
+progress tick and background result handling run exactly as they would
+in the real program.
+
+The report shows per-operation latency (and whether it drifts between the
+start and end of the run), resident memory growth and the object types
+whose counts grew the most, which is where slowdowns and leaks from days
+of continuous playback show up.
+
+    python soak.py --hours 12 --seed 1
+
+Everything the app writes (saved playlists, play history, caches) goes to
+a temporary directory. Crossfade mode is not simulated, and loudness
+analysis and waveform jobs fail at once in-process instead of starting
+worker processes, so the whole run stays in one process.
+"""
+import argparse
+import gc
+import heapq
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import Future
+
+import pygame
+
+BASE_TIME = 1700000000.0  # Simulated wall clock at the start of a run
+
+
+class FakeClock:
+    """Simulated time, advanced only by the soak driver"""
+    def __init__(self):
+        self.now = 0.0
+
+    def time(self):
+        return BASE_TIME + self.now
+
+
+def _track_length(source):
+    """Length of a fake track: its file starts with 'FAKE <seconds>'"""
+    if isinstance(source, (bytes, bytearray)):
+        header = bytes(source[:32])
+    elif hasattr(source, "read"):
+        header = source.read(32)
+    else:
+        with open(source, 'rb') as f:
+            header = f.read(32)
+    try:
+        return float(header.split()[1])
+    except (IndexError, ValueError):
+        raise FakeMixer.error(f"Not a fake track: {source!r}")
+
+
+class FakeMusic:
+    """mixer.music driven by the simulated clock"""
+    def __init__(self, clock):
+        self.clock = clock
+        self.length = None
+        self.started = None  # Clock time that corresponds to position 0
+        self.play_called = None  # Clock time of play(), the base of get_pos()
+        self.paused_at = None
+        self.volume = 1.0
+
+    def load(self, source, namehint=""):
+        self.length = _track_length(source)
+        self.started = None
+
+    def play(self, loops=0, start=0.0):
+        if self.length is None:
+            raise FakeMixer.error("music not loaded")
+        self.started = self.clock.now - start
+        self.play_called = self.clock.now
+        self.paused_at = None
+
+    def _elapsed(self):
+        now = self.paused_at if self.paused_at is not None else self.clock.now
+        return now - self.started
+
+    def get_busy(self):
+        return (self.started is not None and self.paused_at is None
+                and self._elapsed() < self.length)
+
+    def get_pos(self):
+        if self.started is None:
+            return -1
+        # Like pygame, time since play() rather than the track position
+        now = self.paused_at if self.paused_at is not None else self.clock.now
+        return int((now - self.play_called) * 1000)
+
+    def set_pos(self, seconds):
+        if self.started is None:
+            raise FakeMixer.error("music not playing")
+        self.started = (self.paused_at if self.paused_at is not None else self.clock.now) - seconds
+
+    def pause(self):
+        if self.started is not None and self.paused_at is None:
+            self.paused_at = self.clock.now
+
+    def unpause(self):
+        if self.paused_at is not None:
+            delta = self.clock.now - self.paused_at
+            self.started += delta
+            self.play_called += delta
+            self.paused_at = None
+
+    def stop(self):
+        self.started = None
+        self.paused_at = None
+
+    def set_volume(self, volume):
+        self.volume = volume
+
+    def get_volume(self):
+        return self.volume
+
+
+class FakeMixer:
+    """Replacement for the pygame.mixer module"""
+    error = pygame.error
+
+    def __init__(self, clock):
+        self.music = FakeMusic(clock)
+
+        class Sound:
+            def __init__(self, source):
+                self.length = _track_length(source)
+
+            def get_length(self):
+                return self.length
+
+        self.Sound = Sound
+        self.initialized = False
+
+    def init(self, *args, **kwargs):
+        self.initialized = True
+
+    def get_init(self):
+        return (44100, -16, 2) if self.initialized else None
+
+    def quit(self):
+        self.initialized = False
+
+    def set_reserved(self, count):
+        return count
+
+
+# Tk stand-ins
+def _noop(*args, **kwargs):
+    return None
+
+
+class FakeWidget:
+    """Any Tk widget; every method is a no-op"""
+    def __init__(self, *args, **kwargs):
+        self.options = {}
+
+    def __getattr__(self, name):
+        return _noop
+
+    def __setitem__(self, key, value):
+        self.options[key] = value
+
+    def __getitem__(self, key):
+        return self.options.get(key)
+
+
+class FakeVar:
+    """tk variable with working traces"""
+    default = None
+
+    def __init__(self, master=None, value=None):
+        self.value = self.default if value is None else value
+        self.traces = []
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+        for callback in self.traces:
+            callback()
+
+    def trace_add(self, mode, callback):
+        self.traces.append(callback)
+
+
+class FakeStringVar(FakeVar):
+    default = ""
+
+
+class FakeDoubleVar(FakeVar):
+    default = 0.0
+
+
+class FakeBooleanVar(FakeVar):
+    default = False
+
+
+class FakeListbox(FakeWidget):
+    """Listbox holding its rows and selection"""
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+        self.rows = []
+        self.selection = ()
+
+    def delete(self, first, last=None):
+        self.rows = []
+        self.selection = ()
+
+    def insert(self, index, *values):
+        self.rows.extend(values)
+
+    def get(self, index):
+        return self.rows[index]
+
+    def size(self):
+        return len(self.rows)
+
+    def curselection(self):
+        return self.selection
+
+    def selection_clear(self, first, last=None):
+        self.selection = ()
+
+    def selection_set(self, index):
+        self.selection = (index,)
+
+
+class FakeCanvas(FakeWidget):
+    def winfo_width(self):
+        return 400
+
+    def winfo_height(self):
+        return 36
+
+
+class FakeRoot(FakeWidget):
+    """Tk root whose after() timers run on the simulated clock"""
+    def __init__(self, clock):
+        super().__init__()
+        self.clock = clock
+        self.timers = []
+        self.sequence = 0
+
+    def after(self, ms, func=None, *args):
+        self.sequence += 1
+        heapq.heappush(self.timers, (self.clock.now + ms / 1000.0, self.sequence, func, args))
+        return self.sequence
+
+    def after_cancel(self, timer_id):
+        self.timers = [t for t in self.timers if t[1] != timer_id]
+        heapq.heapify(self.timers)
+
+    def run_until(self, deadline, measure):
+        """Run due timers in order, advancing the clock up to deadline"""
+        while self.timers and self.timers[0][0] <= deadline:
+            due, _, func, args = heapq.heappop(self.timers)
+            self.clock.now = max(self.clock.now, due)
+            measure(f"timer:{func.__name__}", func, *args)
+        self.clock.now = max(self.clock.now, deadline)
+
+
+class FakeDialogs:
+    """messagebox/filedialog/simpledialog that count calls and return set answers"""
+    def __init__(self):
+        self.calls = Counter()
+        self.answers = {'askyesno': True}
+
+    def __getattr__(self, name):
+        def dialog(*args, **kwargs):
+            self.calls[name] = self.calls[name] + 1
+            answer = self.answers.get(name)
+            return answer() if callable(answer) else answer
+        return dialog
+
+
+class InlineExecutor:
+    """Executor whose jobs fail immediately, standing in for a process pool"""
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        future.set_exception(RuntimeError("Decoding is not simulated"))
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        pass
+
+
+def _inline(cls):
+    """Subclass of a pool-backed worker class that never starts the pool"""
+    def __init__(self, *args, **kwargs):
+        cls.__init__(self, *args, **kwargs)
+        self.executor = InlineExecutor()
+    return type("Inline" + cls.__name__, (cls,), {"__init__": __init__})
+
+
+class FakeTk:
+    """The tkinter names used by the app"""
+    TclError = type("TclError", (Exception,), {})
+    StringVar = FakeStringVar
+    DoubleVar = FakeDoubleVar
+    BooleanVar = FakeBooleanVar
+    IntVar = FakeVar
+    Listbox = FakeListbox
+    Canvas = FakeCanvas
+
+    def __getattr__(self, name):
+        # Constants such as tk.END or tk.LEFT, otherwise a widget class
+        return name.lower() if name.isupper() else FakeWidget
+
+
+def install_fakes(clock):
+    """Swap pygame.mixer for the fake before the app module is imported"""
+    fake_mixer = FakeMixer(clock)
+    pygame.mixer = fake_mixer
+    sys.modules['pygame.mixer'] = fake_mixer
+    pygame.init = pygame.quit = _noop
+
+    import Playlist
+    dialogs = FakeDialogs()
+    Playlist.tk = FakeTk()
+    Playlist.ttk = FakeTk()
+    Playlist.messagebox = Playlist.filedialog = Playlist.simpledialog = dialogs
+    Playlist.time = clock
+    Playlist.LoudnessAnalyzer = _inline(Playlist.LoudnessAnalyzer)
+    Playlist.WaveformStore = _inline(Playlist.WaveformStore)
+    return Playlist, dialogs
+
+
+# Measurements
+def rss_bytes():
+    """Current resident set size, or the peak where that is unavailable"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def object_counts():
+    gc.collect()
+    return Counter(type(obj).__name__ for obj in gc.get_objects())
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+class SoakStats:
+    """Latency per operation and memory samples over the run"""
+    def __init__(self):
+        self.window = defaultdict(list)    # op -> latencies since the last sample
+        self.windows = defaultdict(list)   # op -> [(p50, p99, max)] per sample
+        self.totals = defaultdict(lambda: [0, 0.0, 0.0])  # op -> count, total, max
+        self.errors = Counter()
+        self.samples = []  # (simulated hours, rss, object count)
+        self.first_counts = None
+        self.last_counts = None
+
+    def measure(self, op, func, *args):
+        start = time.perf_counter()
+        try:
+            func(*args)
+        except Exception as e:
+            self.errors[f"{op}: {type(e).__name__}: {e}"] += 1
+        elapsed = time.perf_counter() - start
+        self.window[op].append(elapsed)
+        total = self.totals[op]
+        total[0] += 1
+        total[1] += elapsed
+        total[2] = max(total[2], elapsed)
+
+    def sample(self, hours):
+        for op, latencies in self.window.items():
+            if latencies:
+                self.windows[op].append(
+                    (percentile(latencies, 0.5), percentile(latencies, 0.99), max(latencies)))
+        self.window.clear()
+
+        counts = object_counts()
+        if self.first_counts is None:
+            self.first_counts = counts
+        self.last_counts = counts
+        self.samples.append((hours, rss_bytes(), sum(counts.values())))
+
+    def report(self, out, dialogs, real_seconds, hours):
+        out.write(f"Simulated {hours:.1f} h in {real_seconds:.1f} s of real time\n\n")
+        out.write(f"{'operation':<34}{'count':>9}{'mean ms':>10}{'max ms':>10}"
+                  f"{'p99 first':>11}{'p99 last':>10}\n")
+        for op in sorted(self.totals):
+            count, total, worst = self.totals[op]
+            windows = self.windows.get(op) or [(0, 0, 0)]
+            out.write(f"{op:<34}{count:>9}{total / count * 1000:>10.3f}{worst * 1000:>10.2f}"
+                      f"{windows[0][1] * 1000:>11.3f}{windows[-1][1] * 1000:>10.3f}\n")
+
+        out.write("\nMemory\n")
+        for hours_at, rss, objects in self.samples:
+            out.write(f"  {hours_at:7.1f} h  RSS {rss / 1048576:8.1f} MB  {objects:>9} objects\n")
+        if len(self.samples) > 1:
+            first, last = self.samples[1], self.samples[-1]  # Skip the warm-up sample
+            out.write(f"  Growth after warm-up: {(last[1] - first[1]) / 1048576:+.1f} MB,"
+                      f" {last[2] - first[2]:+} objects\n")
+
+        growth = (self.last_counts or Counter()) - (self.first_counts or Counter())
+        if growth:
+            out.write("\nObject types that grew the most\n")
+            for name, delta in growth.most_common(10):
+                out.write(f"  {name:<30}{delta:>+9}\n")
+
+        if dialogs.calls:
+            out.write("\nDialogs shown\n")
+            for name, count in dialogs.calls.most_common():
+                out.write(f"  {name:<30}{count:>9}\n")
+        if self.errors:
+            out.write("\nExceptions\n")
+            for message, count in self.errors.most_common(10):
+                out.write(f"  {count:>6} x {message}\n")
+
+
+# Scripted activity
+class SoakDriver:
+    """Plays the part of a user who listens and edits for hours"""
+    def __init__(self, app, dialogs, rng, library, playlist_size, sort_orders):
+        self.app = app
+        self.sort_orders = sort_orders
+        self.dialogs = dialogs
+        self.rng = rng
+        self.library = library
+        self.playlist_size = playlist_size
+        self.actions = [
+            (30, "next", self.next),
+            (5, "previous", self.previous),
+            (8, "shuffle", self.shuffle),
+            (3, "sort", self.sort),
+            (6, "queue", self.queue),
+            (12, "add", self.add),
+            (12, "remove", self.remove),
+            (15, "move", self.move),
+            (5, "pause", self.pause),
+            (4, "seek", self.seek),
+            (3, "undo", self.undo)
+        ]
+        self.weights = [weight for weight, _, _ in self.actions]
+
+    @property
+    def playlist(self):
+        return self.app.playlists[self.app.current_playlist]
+
+    def setup(self):
+        self.dialogs.answers['askstring'] = "Soak"
+        self.app._create_playlist()
+        self.dialogs.answers['askopenfilenames'] = self.library[:self.playlist_size]
+        self.app._add_songs()
+        self.app._play_song()
+
+    def act(self, stats):
+        _, name, action = self.rng.choices(self.actions, weights=self.weights)[0]
+        stats.measure(name, action)
+
+    def select(self, index):
+        self.app.song_listbox.selection = (index,)
+
+    def next(self):
+        self.app._next_song()
+
+    def previous(self):
+        self.app._previous_song()
+
+    def shuffle(self):
+        if self.playlist.is_shuffled:
+            self.app._toggle_order()
+        else:
+            self.app._toggle_shuffle()
+
+    def sort(self):
+        self.app.sort_var.set(self.rng.choice(list(self.sort_orders)))
+        self.app._sort_playlist()
+
+    def queue(self):
+        if self.rng.random() < 0.1:
+            self.app._clear_queue()
+        elif self.playlist.length:
+            self.select(self.rng.randrange(self.playlist.length))
+            self.app._queue_selected(first=self.rng.random() < 0.3)
+
+    def add(self):
+        # Stay near the target size so growth means a leak, not more songs
+        count = self.rng.randint(1, 5) if self.playlist.length < self.playlist_size * 1.2 else 0
+        self.dialogs.answers['askopenfilenames'] = self.rng.sample(self.library, count)
+        self.app._add_songs()
+
+    def remove(self):
+        if self.playlist.length > self.playlist_size * 0.8:
+            self.select(self.rng.randrange(self.playlist.length))
+            self.app._remove_song()
+        if not self.app.is_playing:
+            self.app._play_song()
+
+    def move(self):
+        if self.playlist.length:
+            self.select(self.rng.randrange(self.playlist.length))
+            self.app._move_song(self.rng.choice(("up", "down")))
+
+    def pause(self):
+        self.app._play_pause()
+
+    def seek(self):
+        if self.app.is_playing:
+            self.app._seek(self.rng.uniform(0, self.app.song_length))
+
+    def undo(self):
+        self.app._undo()
+
+
+def make_library(directory, count, rng):
+    """Placeholder audio files that the fake mixer reads a length from"""
+    paths = []
+    for i in range(count):
+        path = os.path.join(directory, f"track_{i:04d}.mp3")
+        with open(path, 'wb') as f:
+            f.write(f"FAKE {rng.uniform(90, 420):.1f}\n".encode() + b"\0" * 4096)
+        paths.append(path)
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--hours", type=float, default=6, help="simulated hours to run")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--library", type=int, default=300, help="distinct tracks available")
+    parser.add_argument("--playlist-size", type=int, default=100)
+    parser.add_argument("--think", type=float, default=30,
+                        help="mean simulated seconds between user actions")
+    parser.add_argument("--sample-minutes", type=float, default=30,
+                        help="simulated minutes between memory samples")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    workdir = tempfile.mkdtemp(prefix="music-soak-")
+    os.chdir(workdir)  # The app reads and writes its data files here
+    os.environ.pop("MUSIC_PLAYER_CONTROL", None)
+
+    clock = FakeClock()
+    module, dialogs = install_fakes(clock)
+    library = make_library(workdir, args.library, rng)
+    stats = SoakStats()
+
+    root = FakeRoot(clock)
+    app = module.MusicPlayerApp(root)
+    driver = SoakDriver(app, dialogs, rng, library, args.playlist_size, module.SORT_ORDERS)
+    driver.setup()
+
+    end = args.hours * 3600
+    interval = args.sample_minutes * 60
+    next_sample = 0.0
+    real_start = time.perf_counter()
+    while clock.now < end:
+        if clock.now >= next_sample:
+            stats.sample(clock.now / 3600)
+            next_sample += interval
+        root.run_until(min(end, clock.now + rng.expovariate(1 / args.think)), stats.measure)
+        driver.act(stats)
+    stats.sample(clock.now / 3600)
+    real_seconds = time.perf_counter() - real_start
+
+    app._on_close()
+    stats.report(sys.stdout, dialogs, real_seconds, clock.now / 3600)
+    print(f"\nData files left in {workdir}")
+
+
+if __name__ == "__main__":
+    main()
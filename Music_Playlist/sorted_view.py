@@ -0,0 +1,128 @@
+"""Sorted views over a playlist, kept up to date incrementally.
+
+A view holds the playlist's nodes ordered by one or more song fields,
+with each node's sort key computed once and cached. The playlist tells
+its views about every node it links, unlinks or replaces, and the view
+answers with a binary-search insertion or deletion instead of sorting
+everything again. Ties keep the order songs were added in, so sorting is
+stable. Playback can follow a view through next_node/previous_node
+without copying or relinking the playlist. Fields beyond the song's own
+metadata, such as play statistics, can be supplied as extra getters.
+"""
+from bisect import bisect_left
+
+SORT_FIELDS = {
+    'title': lambda song: song.title.casefold(),
+    'artist': lambda song: song.artist.casefold(),
+    'album': lambda song: song.album.casefold(),
+    # Songs whose duration is not known yet sort last
+    'duration': lambda song: song.known_duration if song.known_duration is not None else float('inf')
+}
+
+
+class _Descending:
+    """Key wrapper that reverses the comparison of its value"""
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+
+class SortedView:
+    """Playlist nodes sorted by song fields ("-title" for descending)"""
+    def __init__(self, playlist, fields, getters=None):
+        if not fields:
+            raise ValueError("A sorted view needs at least one field")
+        available = dict(SORT_FIELDS, **(getters or {}))  # Extra field -> song key function
+        unknown = [name for name in fields if name.lstrip('-') not in available]
+        if unknown:
+            raise ValueError(f"Unknown sort field(s): {', '.join(unknown)}")
+
+        self.playlist = playlist
+        self.fields = tuple(fields)
+        self._getters = [(available[name.lstrip('-')], name.startswith('-')) for name in fields]
+        self.keys = []   # Sorted key tuples
+        self.nodes = []  # Nodes in the same order as keys
+        self.cache = {}  # node -> key tuple
+        self.nodes_reset()
+        playlist.observers.append(self)
+
+    def _key(self, node):
+        """Sort key for a node; the node serial breaks ties"""
+        key = []
+        for getter, descending in self._getters:
+            value = getter(node.song)
+            key.append(_Descending(value) if descending else value)
+        key.append(node.serial)
+        return tuple(key)
+
+    def close(self):
+        """Stop following the playlist"""
+        if self in self.playlist.observers:
+            self.playlist.observers.remove(self)
+        if self.playlist.order_view is self:
+            self.playlist.order_view = None
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def __iter__(self):
+        return iter(self.nodes)
+
+    def index(self, node):
+        """Position of a node in the view"""
+        key = self.cache[node]
+        return bisect_left(self.keys, key)
+
+    def next_node(self, node):
+        """Node after the given one, wrapping around"""
+        if not self.nodes:
+            return None
+        if node not in self.cache:
+            return self.nodes[0]
+        return self.nodes[(self.index(node) + 1) % len(self.nodes)]
+
+    def previous_node(self, node):
+        """Node before the given one, wrapping around"""
+        if not self.nodes:
+            return None
+        if node not in self.cache:
+            return self.nodes[-1]
+        return self.nodes[self.index(node) - 1]
+
+    # Playlist notifications
+    def node_added(self, node):
+        key = self._key(node)
+        self.cache[node] = key
+        i = bisect_left(self.keys, key)
+        self.keys.insert(i, key)
+        self.nodes.insert(i, node)
+
+    def node_removed(self, node):
+        key = self.cache.pop(node, None)
+        if key is None:
+            return
+        i = bisect_left(self.keys, key)
+        del self.keys[i]
+        del self.nodes[i]
+
+    def node_changed(self, node):
+        """Reposition a node whose song's sort fields changed"""
+        self.node_removed(node)
+        self.node_added(node)
+
+    def nodes_reset(self):
+        """Rebuild after a bulk change, reusing cached keys"""
+        cache = {}
+        for node in self.playlist.original_order:
+            cache[node] = self.cache.get(node) or self._key(node)
+        pairs = sorted(cache.items(), key=lambda item: item[1])
+        self.cache = cache
+        self.nodes = [node for node, _ in pairs]
+        self.keys = [key for _, key in pairs]
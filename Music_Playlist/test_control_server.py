@@ -0,0 +1,129 @@
+"""Control server request/reply and events over a Unix socket (run with pytest)"""
+import json
+import socket
+
+import pytest
+
+from control_server import CommandError, ControlServer, run_on
+
+
+def handle(cmd, args):
+    """Stub player: echoes arguments and fails the way the app does"""
+    if cmd == "echo":
+        return args
+    if cmd == "fail":
+        raise CommandError("Nothing is playing")
+    if cmd == "need":
+        return args["value"]
+    raise CommandError(f"Unknown command: {cmd}")
+
+
+@pytest.fixture
+def server(tmp_path):
+    # Handle commands directly on the server thread instead of a Tk loop
+    server = ControlServer(lambda cmd, args: run_on(lambda call: call(), handle, cmd, args),
+                           unix_path=str(tmp_path / "control.sock"))
+    server.start()
+    yield server
+    server.stop()
+
+
+class Client:
+    def __init__(self, path):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(5)
+        self.sock.connect(path)
+        self.lines = self.sock.makefile("r", encoding="utf-8")
+
+    def send(self, line):
+        self.sock.sendall(line.encode("utf-8") + b"\n")
+
+    def receive(self):
+        return json.loads(self.lines.readline())
+
+    def request(self, **message):
+        self.send(json.dumps(message))
+        return self.receive()
+
+    def close(self):
+        self.lines.close()
+        self.sock.close()
+
+
+@pytest.fixture
+def client(server):
+    client = Client(server.address)
+    yield client
+    client.close()
+
+
+def test_request_reply(client):
+    assert client.request(id=1, cmd="echo", args={"a": 1}) == {"id": 1, "ok": True, "result": {"a": 1}}
+    assert client.request(id=2, cmd="echo") == {"id": 2, "ok": True, "result": {}}
+
+
+def test_error_replies(client):
+    assert client.request(id=3, cmd="fail") == {"id": 3, "ok": False, "error": "Nothing is playing"}
+    assert client.request(id=4, cmd="bogus") == {"id": 4, "ok": False, "error": "Unknown command: bogus"}
+    assert client.request(id=5, cmd="need") == {"id": 5, "ok": False, "error": "Missing argument: 'value'"}
+
+    client.send("not json")
+    assert client.receive() == {"ok": False, "error": "Malformed request"}
+    client.send('{"id": 6}')
+    assert client.receive() == {"ok": False, "error": "Malformed request"}
+
+    # The connection is still usable after errors
+    assert client.request(id=7, cmd="echo", args={"b": 2})["result"] == {"b": 2}
+
+
+def test_subscribe_publish(server, client):
+    other = Client(server.address)
+    try:
+        assert client.request(id=1, cmd="subscribe")["ok"]
+        assert server.has_subscribers
+
+        server.publish("now_playing", title="Song")
+        assert client.receive() == {"event": "now_playing", "title": "Song"}
+
+        # Replies still arrive on a subscribed connection
+        assert client.request(id=2, cmd="echo", args={"c": 3})["result"] == {"c": 3}
+
+        assert client.request(id=3, cmd="unsubscribe")["ok"]
+        assert not server.has_subscribers
+
+        # Clients that never subscribed get no events
+        server.publish("state", state="stopped")
+        assert other.request(id=4, cmd="echo")["ok"]
+    finally:
+        other.close()
+
+
+def test_concurrent_clients(server):
+    clients = [Client(server.address) for _ in range(20)]
+    try:
+        for i, client in enumerate(clients):
+            client.send(json.dumps({"id": i, "cmd": "echo", "args": {"n": i}}))
+        for i, client in enumerate(clients):
+            assert client.receive() == {"id": i, "ok": True, "result": {"n": i}}
+    finally:
+        for client in clients:
+            client.close()
+
+
+@pytest.mark.parametrize("host", ["0.0.0.0", "::", "192.168.1.10", "example.com"])
+def test_non_loopback_host_refused(host):
+    with pytest.raises(ValueError):
+        ControlServer(lambda cmd, args: None, host=host, port=0)
+
+
+def test_loopback_tcp():
+    server = ControlServer(lambda cmd, args: run_on(lambda call: call(), handle, cmd, args),
+                           host="127.0.0.1", port=0)
+    host, port = server.start()
+    try:
+        with socket.create_connection((host, port), timeout=5) as sock:
+            sock.sendall(b'{"id": 1, "cmd": "echo", "args": {"x": 1}}\n')
+            reply = json.loads(sock.makefile("r").readline())
+        assert reply == {"id": 1, "ok": True, "result": {"x": 1}}
+    finally:
+        server.stop()
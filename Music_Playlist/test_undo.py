@@ -0,0 +1,227 @@
+"""Undo/redo round-trips for playlist edits (run with pytest)"""
+import os
+
+# Importing Playlist initializes pygame; no display or sound card is needed
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from Playlist import Playlist, Song
+from undo import UndoLog
+
+
+def make_playlist(name, titles, log=None):
+    playlist = Playlist(name)
+    for title in titles:
+        playlist.add_song(Song(f"/music/{title}.mp3", title=title, duration=60, probe=False))
+    playlist.undo_log = log
+    return playlist
+
+
+def titles(playlist):
+    """Titles in original order, checking the linked list agrees with it"""
+    order = [node.song.title for node in playlist.original_order]
+    linked = []
+    node, prev = playlist.head, None
+    while node:
+        assert node.prev is prev
+        linked.append(node.song.title)
+        prev, node = node, node.next
+    assert playlist.tail is prev
+    assert linked == order
+    assert playlist.length == len(order)
+    return order
+
+
+def undo_all(log):
+    while log.undo():
+        pass
+
+
+def redo_all(log):
+    while log.redo():
+        pass
+
+
+def test_add_round_trip():
+    log = UndoLog()
+    playlist = make_playlist("p", "ab", log)
+    playlist.add_song(Song("/music/c.mp3", title="c", duration=60, probe=False))
+    playlist.add_song(Song("/music/d.mp3", title="d", duration=60, probe=False))
+
+    log.undo()
+    assert titles(playlist) == list("abc")
+    log.undo()
+    assert titles(playlist) == list("ab")
+    assert log.undo() is None
+
+    redo_all(log)
+    assert titles(playlist) == list("abcd")
+
+
+def test_remove_round_trip():
+    log = UndoLog()
+    playlist = make_playlist("p", "abcde", log)
+    playlist.remove_song("a")
+    playlist.remove_song("d")
+    playlist.remove_song("e")
+    assert titles(playlist) == list("bc")
+
+    undo_all(log)
+    assert titles(playlist) == list("abcde")
+    redo_all(log)
+    assert titles(playlist) == list("bc")
+
+
+def test_remove_current_song():
+    log = UndoLog()
+    playlist = make_playlist("p", "abc", log)
+    playlist.current = playlist.original_order[1]
+    playlist.remove_song("b")
+    assert playlist.current.song.title == "c"
+
+    log.undo()
+    assert titles(playlist) == list("abc")
+
+
+def test_moves_coalesce():
+    log = UndoLog()
+    playlist = make_playlist("p", "abcde", log)
+    playlist.move_song("a", "down")
+    playlist.move_song("a", "down")
+    playlist.move_song("a", "down")
+    assert titles(playlist) == list("bcdae")
+    assert len(log.undo_stack) == 1
+
+    log.undo()
+    assert titles(playlist) == list("abcde")
+    log.redo()
+    assert titles(playlist) == list("bcdae")
+
+
+def test_move_back_to_start_drops_step():
+    log = UndoLog()
+    playlist = make_playlist("p", "abc", log)
+    playlist.move_song("b", "up")
+    playlist.move_song("b", "down")
+    assert titles(playlist) == list("abc")
+    assert not log.can_undo()
+
+
+def test_moves_of_different_songs_stay_separate():
+    log = UndoLog()
+    playlist = make_playlist("p", "abcd", log)
+    playlist.move_song("a", "down")
+    playlist.move_song("d", "up")
+    assert titles(playlist) == list("badc")
+
+    log.undo()
+    assert titles(playlist) == list("bacd")
+    log.undo()
+    assert titles(playlist) == list("abcd")
+
+
+def test_merge_round_trip():
+    log = UndoLog()
+    playlist = make_playlist("p", "abc", log)
+    other = make_playlist("q", "bdce")
+    assert playlist.merge(other) == 2
+    assert titles(playlist) == list("abcde")
+
+    log.undo()
+    assert titles(playlist) == list("abc")
+    log.redo()
+    assert titles(playlist) == list("abcde")
+
+
+def test_difference_round_trip():
+    log = UndoLog()
+    playlist = make_playlist("p", "abcdef", log)
+    assert playlist.difference(make_playlist("q", "bdf")) == 3
+    assert titles(playlist) == list("ace")
+
+    log.undo()
+    assert titles(playlist) == list("abcdef")
+    log.redo()
+    assert titles(playlist) == list("ace")
+
+
+def test_intersection_round_trip():
+    log = UndoLog()
+    playlist = make_playlist("p", "abcdef", log)
+    assert playlist.intersection(make_playlist("q", "fca")) == 3
+    assert titles(playlist) == list("acf")
+
+    log.undo()
+    assert titles(playlist) == list("abcdef")
+    log.redo()
+    assert titles(playlist) == list("acf")
+
+
+def test_dedupe_round_trip():
+    log = UndoLog()
+    playlist = make_playlist("p", "abacbd", log)
+    assert playlist.dedupe() == 2
+    assert titles(playlist) == list("abcd")
+
+    log.undo()
+    assert titles(playlist) == list("abacbd")
+    log.redo()
+    assert titles(playlist) == list("abcd")
+
+
+def test_single_edits_around_bulk_ops():
+    """Index-based ops replay correctly after _set_order rebuilt the list"""
+    log = UndoLog()
+    playlist = make_playlist("p", "abcd", log)
+    playlist.remove_song("b")
+    playlist.merge(make_playlist("q", "ef"))
+    playlist.move_song("a", "down")
+    playlist.dedupe()  # Nothing to remove, records nothing
+    playlist.add_song(Song("/music/g.mp3", title="g", duration=60, probe=False))
+    playlist.difference(make_playlist("r", "de"))
+    assert titles(playlist) == list("cafg")
+
+    states = []
+    while True:
+        states.append(titles(playlist))
+        if not log.undo():
+            break
+    assert states == [
+        list("cafg"),
+        list("cadefg"),
+        list("cadef"),
+        list("acdef"),
+        list("acd"),
+        list("abcd"),
+    ]
+
+    for expected in reversed(states[:-1]):
+        log.redo()
+        assert titles(playlist) == expected
+
+
+def test_grouped_adds_undo_as_one_step():
+    log = UndoLog()
+    playlist = make_playlist("p", "a", log)
+    with log.group("Add songs"):
+        for title in "bcd":
+            playlist.add_song(Song(f"/music/{title}.mp3", title=title, duration=60, probe=False))
+    assert len(log.undo_stack) == 1
+
+    log.undo()
+    assert titles(playlist) == ["a"]
+    log.redo()
+    assert titles(playlist) == list("abcd")
+
+
+def test_new_edit_clears_redo():
+    log = UndoLog()
+    playlist = make_playlist("p", "abc", log)
+    playlist.remove_song("a")
+    log.undo()
+    assert log.can_redo()
+    playlist.remove_song("c")
+    assert not log.can_redo()
+
+    undo_all(log)
+    assert titles(playlist) == list("abc")
@@ -0,0 +1,209 @@
+"""Undo/redo log of playlist edits stored as small inverse operations.
+
+Each operation only references the nodes it touched, so the log holds
+memory proportional to the change rather than a snapshot of the playlist.
+Replaying a single insert, remove or move relinks its node in O(1) but
+still shifts the playlist's positional original_order list, which is
+O(n); bulk operations rebuild the order and are O(n) as well.
+"""
+from collections import deque
+from contextlib import contextmanager
+
+
+class InsertOp:
+    """A node inserted into a playlist"""
+    def __init__(self, playlist, index, node):
+        self.playlist = playlist
+        self.index = index
+        self.node = node
+        self.label = f"Add {node.song.title}"
+        self.weight = 1
+
+    def undo(self):
+        self.playlist._unlink_node(self.node, self.index)
+
+    def redo(self):
+        self.playlist._link_node(self.index, self.node)
+
+
+class RemoveOp:
+    """A node removed from a playlist"""
+    def __init__(self, playlist, index, node):
+        self.playlist = playlist
+        self.index = index
+        self.node = node
+        self.label = f"Remove {node.song.title}"
+        self.weight = 1
+
+    def undo(self):
+        self.playlist._link_node(self.index, self.node)
+
+    def redo(self):
+        self.playlist._unlink_node(self.node, self.index)
+
+
+class MoveOp:
+    """A node moved to another position; repeated moves coalesce"""
+    def __init__(self, playlist, node, from_index, to_index):
+        self.playlist = playlist
+        self.node = node
+        self.from_index = from_index
+        self.to_index = to_index
+        self.label = f"Move {node.song.title}"
+        self.weight = 1
+
+    def undo(self):
+        self.playlist._move_node(self.to_index, self.from_index)
+
+    def redo(self):
+        self.playlist._move_node(self.from_index, self.to_index)
+
+    def absorb(self, other):
+        """Fold a following move of the same node into this one"""
+        if (isinstance(other, MoveOp) and other.playlist is self.playlist
+                and other.node is self.node and other.from_index == self.to_index):
+            self.to_index = other.to_index
+            return True
+        return False
+
+
+class BulkOp:
+    """Nodes removed from and/or appended to a playlist in one update"""
+    def __init__(self, playlist, label, removed=(), added=()):
+        self.playlist = playlist
+        self.label = label
+        self.removed = list(removed)  # (index, node) pairs, ascending index
+        self.added = list(added)      # Nodes appended to the end
+        self.weight = len(self.removed) + len(self.added)
+
+    def undo(self):
+        nodes = self.playlist.original_order
+        if self.added:
+            nodes = nodes[:len(nodes) - len(self.added)]
+
+        # Merge removed nodes back in at their original positions
+        restored = []
+        remaining = iter(nodes)
+        for index, node in self.removed:
+            while len(restored) < index:
+                restored.append(next(remaining))
+            restored.append(node)
+        restored.extend(remaining)
+        self.playlist._set_order(restored)
+
+    def redo(self):
+        removed = set(id(node) for _, node in self.removed)
+        nodes = [node for node in self.playlist.original_order if id(node) not in removed]
+        self.playlist._set_order(nodes + self.added)
+
+
+class GroupOp:
+    """Several operations undone and redone as one step"""
+    def __init__(self, label, ops):
+        self.label = label
+        self.ops = ops
+        self.playlist = ops[0].playlist
+        self.weight = sum(op.weight for op in ops)
+
+    def undo(self):
+        for op in reversed(self.ops):
+            op.undo()
+
+    def redo(self):
+        for op in self.ops:
+            op.redo()
+
+
+class UndoLog:
+    """Bounded undo/redo stacks of playlist operations"""
+    def __init__(self, max_ops=200, max_nodes=100000):
+        self.max_ops = max_ops
+        self.max_nodes = max_nodes  # Limit on nodes referenced by the log
+        self.undo_stack = deque()
+        self.redo_stack = []
+        self.weight = 0
+        self._group = None
+
+    @staticmethod
+    def _push(ops, op):
+        """Append op, coalescing it into the previous move if possible"""
+        last = ops[-1] if ops else None
+        if isinstance(last, MoveOp) and last.absorb(op):
+            if last.from_index == last.to_index:
+                ops.pop()  # Moved back where it started
+            return
+        ops.append(op)
+
+    def record(self, op):
+        """Record an operation that has just been applied"""
+        if self._group is not None:
+            self._push(self._group, op)
+            return
+
+        self.redo_stack.clear()
+        before = len(self.undo_stack)
+        last = self.undo_stack[-1] if before else None
+        self._push(self.undo_stack, op)
+
+        if len(self.undo_stack) > before:
+            self.weight += op.weight
+        elif len(self.undo_stack) < before:
+            self.weight -= last.weight
+        self._trim()
+
+    @contextmanager
+    def group(self, label):
+        """Record all operations inside the block as a single undo step"""
+        if self._group is not None:
+            yield  # Nested groups fold into the outer one
+            return
+
+        self._group = []
+        try:
+            yield
+        finally:
+            ops, self._group = self._group, None
+            if len(ops) == 1:
+                self.record(ops[0])
+            elif ops:
+                self.record(GroupOp(label, ops))
+
+    def _trim(self):
+        """Drop the oldest operations beyond the memory bounds"""
+        while len(self.undo_stack) > 1 and (
+                len(self.undo_stack) > self.max_ops or self.weight > self.max_nodes):
+            self.weight -= self.undo_stack.popleft().weight
+
+    def can_undo(self):
+        return bool(self.undo_stack)
+
+    def can_redo(self):
+        return bool(self.redo_stack)
+
+    def undo(self):
+        """Revert the most recent operation and return it, or None"""
+        if not self.undo_stack:
+            return None
+        op = self.undo_stack.pop()
+        self.weight -= op.weight
+        op.undo()
+        self.redo_stack.append(op)
+        return op
+
+    def redo(self):
+        """Re-apply the most recently undone operation and return it, or None"""
+        if not self.redo_stack:
+            return None
+        op = self.redo_stack.pop()
+        op.redo()
+        self.undo_stack.append(op)
+        self.weight += op.weight
+        self._trim()
+        return op
+
+    def discard(self, playlist):
+        """Forget all operations on a playlist, e.g. when it is deleted"""
+        kept = [op for op in self.undo_stack if op.playlist is not playlist]
+        self.undo_stack = deque(kept)
+        self.weight = sum(op.weight for op in kept)
+        self.redo_stack = [op for op in self.redo_stack if op.playlist is not playlist]
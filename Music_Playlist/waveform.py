@@ -0,0 +1,134 @@
+"""Waveform peak overviews for the progress bar, cached on disk.
+
+Peaks are computed once per track in a background process by decoding
+through pygame and downsampling with NumPy, then stored as small .npy
+files keyed by path, size and modification time.
+"""
+import hashlib
+import multiprocessing
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from loudness import init_worker
+
+BUCKETS = 1000  # Peak values stored per track
+
+
+def cache_file(cache_dir, path):
+    """Cache file for a track, invalidated when the file changes"""
+    try:
+        stat = os.stat(path)
+        stamp = f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}"
+    except OSError:
+        return None
+    digest = hashlib.sha1(stamp.encode("utf-8", "surrogatepass")).hexdigest()
+    return os.path.join(cache_dir, digest + ".npy")
+
+
+def compute_peaks(path, buckets=BUCKETS):
+    """Decode a file and return normalized peak amplitudes per bucket"""
+    import pygame
+    sound = pygame.mixer.Sound(path)
+    samples = pygame.sndarray.array(sound)
+    size = pygame.mixer.get_init()[1]
+    del sound
+
+    # Max absolute amplitude across channels, per frame
+    data = np.abs(samples.reshape(len(samples), -1).astype(np.float32)).max(axis=1)
+    data /= float(2 ** (abs(size) - 1))
+    if not len(data):
+        return np.zeros(buckets, dtype=np.float32)
+
+    # Pad to a whole number of buckets and take the max of each
+    per_bucket = -(-len(data) // buckets)
+    padded = np.zeros(per_bucket * buckets, dtype=np.float32)
+    padded[:len(data)] = data
+    peaks = padded.reshape(buckets, per_bucket).max(axis=1)
+    return np.clip(peaks, 0.0, 1.0)
+
+
+def load_or_compute(path, cache_dir):
+    """Return cached peaks for a file, computing and caching them if needed"""
+    cached = cache_file(cache_dir, path)
+    if cached and os.path.exists(cached):
+        try:
+            return np.load(cached)
+        except (OSError, ValueError):
+            pass  # Corrupt cache entry; recompute below
+
+    peaks = compute_peaks(path)
+    if cached:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = cached + ".tmp.npy"
+        np.save(tmp_path, peaks)
+        os.replace(tmp_path, cached)
+    return peaks
+
+
+class WaveformStore:
+    """In-memory LRU of peak arrays backed by a disk cache and a worker"""
+    def __init__(self, on_ready, cache_dir="waveform_cache", memory_items=32):
+        self.on_ready = on_ready  # Called as on_ready(path, peaks) from a pool thread
+        self.cache_dir = cache_dir
+        self.memory_items = memory_items
+        self.available = np is not None
+        self.memory = OrderedDict()
+        self.pending = set()
+        self.executor = None
+
+    def get(self, path):
+        """Return peaks if already in memory, otherwise start loading them"""
+        if path in self.memory:
+            self.memory.move_to_end(path)
+            return self.memory[path]
+        if not self.available or path in self.pending:
+            return None
+
+        if self.executor is None:
+            try:
+                # Spawn rather than fork the Tk/SDL process
+                self.executor = ProcessPoolExecutor(
+                    1,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=init_worker
+                )
+            except (OSError, NotImplementedError):
+                self.available = False
+                return None
+        self.pending.add(path)
+        try:
+            future = self.executor.submit(load_or_compute, path, self.cache_dir)
+        except RuntimeError:
+            self.pending.discard(path)
+            return None
+        future.add_done_callback(lambda f, path=path: self._done(path, f))
+        return None
+
+    def _done(self, path, future):
+        """Report a finished job (runs on a pool thread)"""
+        try:
+            peaks = future.result().tolist()
+        except Exception:
+            peaks = None
+        self.on_ready(path, peaks)
+
+    def store(self, path, peaks):
+        """Keep finished peaks in memory (call from the UI thread)"""
+        self.pending.discard(path)
+        if peaks is None:
+            return
+        self.memory[path] = peaks
+        self.memory.move_to_end(path)
+        while len(self.memory) > self.memory_items:
+            self.memory.popitem(last=False)
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None